@@ -1,22 +1,19 @@
-import subprocess
+import sys
 import os
 
+# Runs from the root of the checked out repository; the sync runs in this process, from the repository's tools folder.
+sys.path.append(os.path.join(".", "tools"))
+import sample_sync
+
 def main():
 
     '''
-    Usage: python sample_sync.py 
+    Usage: python samplesync_change_checker.py
     '''
 
-    readme_script_path = os.path.join(".","tools", "readme_copy", "readme_copy.py")
-    metadata_script_path = os.path.join(".", "tools", "metadata_tools", "process_metadata.py")
-
-    print("Copying readmes")
-    subprocess.run(["python", readme_script_path])
-
-    print("Updating metadata")
-    subprocess.run(["python", metadata_script_path])
+    sample_sync.sync_samples(os.path.join(".", "src"))
 
     return
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
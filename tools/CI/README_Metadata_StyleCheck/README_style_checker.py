@@ -1,11 +1,17 @@
 #!/usr/bin/env python3
 
-from ast import Tuple
 import os
-import re
+import sys
 import typing
 import argparse
 
+# Shared sample tools live in tools/metadata_tools. In the CI container this
+# script runs from '/', so also look in the checked-out workspace.
+sys.path.append(os.path.join(os.path.dirname(os.path.realpath(__file__)), '..', '..', 'metadata_tools'))
+sys.path.append(os.path.join('.', 'tools', 'metadata_tools'))
+from readme_parser import parse_readme
+import check_runner
+
 # region Global sets
 # A set of words that get omitted during letter-case checks.
 exception_proper_nouns = {
@@ -48,6 +54,14 @@ categories = {
     'UtilityNetwork'
 }
 
+# The version of the checks below. Bump it whenever a check changes, so that
+# results cached by earlier runs of --all are not reused.
+rule_version = 1
+
+# Results of --all runs are cached next to this script by default.
+default_cache_path = os.path.join(os.path.dirname(os.path.realpath(__file__)),
+                                  '.readme_style_check_cache.json')
+
 # endregion
 
 
@@ -230,22 +244,15 @@ class ReadmeStyleChecker:
         :return: None. Throws if exception occurs.
         """
         try:
-            readme_file = open(self.readme_path, 'r')
-            # read the readme content into a string
-            contents = readme_file.read()
-            # A regular expression that matches exactly 2 pound marks, and
-            # capture the trailing string.
-            pattern = re.compile(r'^#{2}(?!#)\s(.*)', re.MULTILINE)
-            self.readme_contents = contents
-            # Use regex to split the README by section headers, so that they are
+            # Read the README and split it by section headers, so that they are
             # separated into paragraphs.
-            self.readme_parts = re.split(pattern, contents)
+            readme = parse_readme(self.readme_path)
+            self.readme_contents = readme.contents
+            self.readme_parts = readme.parts
             # Capture the section headers.
-            self.readme_headers = re.findall(pattern, contents)
+            self.readme_headers = readme.headers
         except Exception as err:
             raise Exception(f'Error loading file - {self.readme_path} - {err}.')
-        else:
-            readme_file.close()
 
     def check_format_heading(self) -> None:
         """
@@ -338,44 +345,41 @@ class ReadmeStyleChecker:
 
 
 # region Main wrapper functions
-def run_check(path: str, count: int) -> int:
+def get_errors(path: str) -> typing.List[str]:
+    """
+    Run every check on a sample folder.
+
+    :param path: The path to the sample folder.
+    :return: The error messages, in the order the checks ran.
+    """
     checker = ReadmeStyleChecker(path)
-    # 1. Populate from README.
-    try:
-        checker.populate_from_readme()
-    except Exception as err:
-        count += 1
-        print(f'{count}. {checker.folder_path} - {err}')
-    # 2. Check format of headings, e.g. 'Use case', 'How it works', etc.
-    try:
-        checker.check_format_heading()
-    except Exception as err:
-        count += 1
-        print(f'{count}. {checker.folder_path} - {err}')
-    # 3. Check format of title section, i.e. title, description and image URLs.
-    try:
-        checker.check_format_title_section()
-    except Exception as err:
-        count += 1
-        print(f'{count}. {checker.folder_path} - {err}')
-    # 4. Check format of relevant APIs.
-    try:
-        checker.check_format_apis()
-    except Exception as err:
-        count += 1
-        print(f'{count}. {checker.folder_path} - {err}')
-    # 5. Check format of tags.
-    try:
-        checker.check_format_tags()
-    except Exception as err:
-        count += 1
-        print(f'{count}. {checker.folder_path} - {err}')
-    # 6. Check if redundant APIs in tags
-    try:
-        checker.check_redundant_apis_in_tags()
-    except Exception as err:
+    checks = [
+        # 1. Populate from README.
+        checker.populate_from_readme,
+        # 2. Check format of headings, e.g. 'Use case', 'How it works', etc.
+        checker.check_format_heading,
+        # 3. Check format of title section, i.e. title, description and image URLs.
+        checker.check_format_title_section,
+        # 4. Check format of relevant APIs.
+        checker.check_format_apis,
+        # 5. Check format of tags.
+        checker.check_format_tags,
+        # 6. Check if redundant APIs in tags
+        checker.check_redundant_apis_in_tags
+    ]
+    errors = []
+    for check in checks:
+        try:
+            check()
+        except Exception as err:
+            errors.append(f'{checker.folder_path} - {err}')
+    return errors
+
+
+def run_check(path: str, count: int) -> int:
+    for error in get_errors(path):
         count += 1
-        print(f'{count}. {checker.folder_path} - {err}')
+        print(f'{count}. {error}')
     return count
 
 
@@ -386,20 +390,27 @@ def single(path: str):
         raise Exception('Error(s) occurred during checking a single design.')
 
 
-def all_designs(path: str):
-    exception_count = 0
-    for root, dirs, files in os.walk(path):
-        # Get parent folder name.
-        parent_folder_name = get_folder_name_from_path(root)
-        # If parent folder name is a valid category name.
-        if parent_folder_name in categories:
-            for dir_name in dirs:
-                sample_path = os.path.join(root, dir_name)
-                # Omit empty folders - they are omitted by Git.
-                if len([f for f in os.listdir(sample_path)
-                        if not f.startswith('.DS_Store')]) == 0:
-                    continue
-                exception_count = run_check(sample_path, exception_count)
+def all_designs(path: str, path_to_cache: str = None,
+                shard: typing.Tuple[int, int] = (1, 1),
+                path_to_results: str = None, jobs: int = 1):
+    """
+    Run the check on all samples.
+
+    :param path: The path to the samples root folder.
+    :param path_to_cache: The path to the results cache, or None to check
+    every sample without reading or writing a cache.
+    :param shard: A tuple of (i, N) to check only the i-th of N shards of
+    the samples; see check_runner.in_shard.
+    :param path_to_results: The path to write the results to as JSON, for
+    'check_runner.py merge'; None to not write them.
+    :param jobs: The number of processes checking samples; errors are printed
+    in the same order whatever the number.
+    :return: None. Throws if exception occurs.
+    """
+    exception_count = check_runner.check_all(path, categories, get_errors,
+                                             rule_version, 'README_style_checker',
+                                             path_to_cache, shard,
+                                             path_to_results, jobs)
 
     # Throw once if there are exceptions.
     if exception_count > 0:
@@ -416,10 +427,23 @@ def main():
     parser = argparse.ArgumentParser(description=msg)
     parser.add_argument('-a', '--all', help='path to project root folder')
     parser.add_argument('-s', '--single', help='path to a sample folder')
+    parser.add_argument('--cache', default=default_cache_path,
+                        help='path to the results cache used with --all')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='check every sample, without reading or '
+                             'writing the results cache')
+    parser.add_argument('--shard', type=check_runner.parse_shard, default=(1, 1),
+                        help='with --all, check only shard i of N, e.g. 2/4')
+    parser.add_argument('--results',
+                        help='with --all, also write the results as JSON, to '
+                             'combine shards with "check_runner.py merge"')
+    parser.add_argument('--jobs', type=int, default=1,
+                        help='with --all, number of processes checking samples')
     args = parser.parse_args()
     if args.all:
         try:
-            all_designs(args.all)
+            all_designs(args.all, None if args.no_cache else args.cache,
+                        args.shard, args.results, args.jobs)
         except Exception as err:
             raise err
     elif args.single:
@@ -0,0 +1,360 @@
+#!/usr/bin/env python3
+
+import io
+import os
+import sys
+import json
+import typing
+import hashlib
+import argparse
+import contextlib
+from concurrent.futures import ProcessPoolExecutor
+
+# Shared sample tools live in tools/metadata_tools. In the CI container this
+# script runs from '/', so also look in the checked-out workspace.
+sys.path.append(os.path.join(os.path.dirname(os.path.realpath(__file__)), '..', '..', 'metadata_tools'))
+sys.path.append(os.path.join('.', 'tools', 'metadata_tools'))
+from sample_index import get_index
+
+# region Global values
+# Bump when the cache layout changes; older caches are discarded.
+cache_version = 1
+
+# The files whose contents the checks read, besides the folder listing.
+checked_files = ['readme.md', 'readme.metadata.json']
+
+# endregion
+
+
+# region Static functions
+def find_samples(path: str, categories: typing.Set[str]) -> typing.List[str]:
+    """
+    Find the sample folders under a root folder, in the order they are walked.
+
+    :param path: The path to the root folder, e.g. the repo's src folder.
+    :param categories: The category folder names; samples are the non-empty
+    folders directly inside a category folder.
+    :return: A list of sample folder paths, built from the path passed in.
+    """
+    samples = []
+    index = get_index(path)
+    for root, dirs, files in index.walk(path):
+        # If parent folder name is a valid category name.
+        if os.path.basename(os.path.normpath(root)) in categories:
+            for dir_name in dirs:
+                sample_path = os.path.join(root, dir_name)
+                # Omit empty folders - they are omitted by Git.
+                if len([f for f in index.listdir(sample_path)
+                        if not f.startswith('.DS_Store')]) == 0:
+                    continue
+                samples.append(sample_path)
+    return samples
+
+
+def parse_shard(shard: str) -> typing.Tuple[int, int]:
+    """
+    Parse a shard argument such as '2/4' (the second of four shards).
+
+    :param shard: A string of the form 'i/N', with 1 <= i <= N.
+    :return: A tuple of (i, N). Throws if the format is wrong.
+    """
+    try:
+        index, count = (int(part) for part in shard.split('/'))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f'Invalid shard "{shard}", expected i/N.')
+    if count < 1 or not 1 <= index <= count:
+        raise argparse.ArgumentTypeError(f'Invalid shard "{shard}", expected 1 <= i <= N.')
+    return index, count
+
+
+def in_shard(sample_path: str, root: str, shard: typing.Tuple[int, int]) -> bool:
+    """
+    Check if a sample belongs to a shard. Samples are assigned by a hash of
+    their path relative to the root, so every machine and every run splits
+    the samples the same way, and each sample is in exactly one shard.
+
+    :param sample_path: The path to the sample folder.
+    :param root: The root folder the samples were found in.
+    :param shard: A tuple of (i, N), see parse_shard.
+    :return: True if the sample is in the shard.
+    """
+    index, count = shard
+    relative_path = os.path.relpath(sample_path, root).replace(os.path.sep, '/')
+    digest = hashlib.sha1(relative_path.encode()).hexdigest()
+    return int(digest, 16) % count == index - 1
+
+
+def get_sample_key(sample_path: str, rule_version: int) -> str:
+    """
+    Hash everything a check result depends on: the README, the metadata, the
+    sample's file listing and the version of the checker's rules.
+
+    :param sample_path: The path to the sample folder.
+    :param rule_version: The checker's rule version.
+    :return: A hex digest; equal digests mean the cached result still holds.
+    """
+    digest = hashlib.sha256()
+    digest.update(f'rules {rule_version}\n'.encode())
+    for name in checked_files:
+        try:
+            with open(os.path.join(sample_path, name), 'rb') as file:
+                contents = file.read()
+        except OSError:
+            digest.update(f'{name} missing\n'.encode())
+            continue
+        digest.update(f'{name} {len(contents)}\n'.encode())
+        digest.update(contents)
+    listing = sorted(get_index(sample_path).listdir(sample_path))
+    digest.update('\n'.join(listing).encode())
+    return digest.hexdigest()
+
+
+def load_cache(path_to_cache: str) -> typing.Dict[str, dict]:
+    """
+    Read the check results recorded by the previous run.
+
+    :param path_to_cache: The path to the cache file.
+    :return: A dictionary of sample path -> {'key', 'output', 'errors'}; empty
+    if the cache is missing or has a different layout.
+    """
+    try:
+        with open(path_to_cache, 'r') as cache_file:
+            cache = json.load(cache_file)
+    except (OSError, ValueError):
+        return {}
+    if cache.get('version') != cache_version:
+        return {}
+    return cache.get('samples', {})
+
+
+def save_cache(path_to_cache: str, results: typing.List[dict],
+               kept_samples: typing.List[str] = ()) -> None:
+    """
+    Record the check results of this run, for the next run to reuse.
+
+    :param path_to_cache: The path to the cache file.
+    :param results: The results returned by run_checks.
+    :param kept_samples: Samples that were not checked in this run (e.g. they
+    are in another shard) whose cached results are kept, as the file holds
+    them when it is written.
+    :return: None.
+    """
+    previous = load_cache(path_to_cache) if kept_samples else {}
+    samples = {path: previous[path] for path in kept_samples if path in previous}
+    samples.update({result['path']: {'key': result['key'],
+                                     'output': result['output'],
+                                     'errors': result['errors']}
+                    for result in results})
+    with open(path_to_cache, 'w+') as cache_file:
+        json.dump({'version': cache_version, 'samples': samples}, cache_file,
+                  sort_keys=True)
+
+
+def save_results(path_to_results: str, checker: str,
+                 shard: typing.Tuple[int, int], sample_count: int,
+                 results: typing.List[dict]) -> None:
+    """
+    Write the results of a (sharded) run as JSON, for the merge command.
+
+    :param path_to_results: The path to the JSON file.
+    :param checker: The name of the checker, e.g. 'README_style_checker'.
+    :param shard: A tuple of (i, N), see parse_shard.
+    :param sample_count: The number of samples in all shards together.
+    :param results: The results returned by run_checks, with their positions.
+    :return: None.
+    """
+    data = {
+        'checker': checker,
+        'shard': list(shard),
+        'sample_count': sample_count,
+        'samples': [{'path': result['path'],
+                     'position': result['position'],
+                     'output': result['output'],
+                     'errors': result['errors']} for result in results]
+    }
+    with open(path_to_results, 'w+') as results_file:
+        json.dump(data, results_file, indent=4)
+# endregion
+
+
+# region Main wrapper functions
+def run_check(path: str, check: typing.Callable[[str], typing.List[str]]) -> dict:
+    """
+    Run a checker's per-sample check, capturing what it prints.
+
+    :param path: The path to the sample folder.
+    :param check: A function returning the list of errors for a sample.
+    :return: A dictionary of 'path', 'output' (printed text) and 'errors'.
+    """
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        errors = check(path)
+    return {'path': path, 'output': output.getvalue(), 'errors': errors}
+
+
+def run_checks(samples: typing.List[str],
+               check: typing.Callable[[str], typing.List[str]],
+               rule_version: int,
+               cache: typing.Dict[str, dict] = None,
+               jobs: int = 1) -> typing.List[dict]:
+    """
+    Check every sample, reusing the cached result of samples whose README,
+    metadata, file listing and rules have not changed since it was recorded.
+    Cached passes are skipped and cached failures are replayed as they were.
+
+    :param samples: The sample folder paths, e.g. from find_samples.
+    :param check: A module-level function returning the list of errors for a
+    sample, so that it can be called in worker processes.
+    :param rule_version: The checker's rule version.
+    :param cache: The results of a previous run (see load_cache), or None to
+    check every sample.
+    :param jobs: The number of processes checking samples; 1 checks them in
+    this process.
+    :return: A list of {'path', 'key', 'output', 'errors'} in sample order,
+    whatever the number of jobs.
+    """
+    results = {}
+    keys = {}
+    pending = []
+    for path in samples:
+        keys[path] = get_sample_key(path, rule_version)
+        cached = cache.get(path) if cache is not None else None
+        if cached is not None and cached.get('key') == keys[path]:
+            results[path] = {'path': path, 'output': cached['output'],
+                             'errors': cached['errors']}
+        else:
+            pending.append(path)
+
+    if jobs > 1 and len(pending) > 1:
+        # Hand out samples in chunks; a single check is too quick to be
+        # worth a round trip to a worker on its own.
+        chunk_size = max(1, len(pending) // (jobs * 4))
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            checked = executor.map(run_check, pending, [check] * len(pending),
+                                   chunksize=chunk_size)
+            results.update(zip(pending, checked))
+    else:
+        results.update((path, run_check(path, check)) for path in pending)
+
+    for path in samples:
+        results[path]['key'] = keys[path]
+    return [results[path] for path in samples]
+
+
+def print_results(results: typing.List[dict], count: int = 0) -> int:
+    """
+    Print the output and numbered errors of each sample, in order.
+
+    :param results: The results returned by run_checks.
+    :param count: The number of errors printed before these.
+    :return: The number of errors printed in total.
+    """
+    for result in results:
+        print(result['output'], end='')
+        for error in result['errors']:
+            count += 1
+            print(f'{count}. {error}')
+    return count
+
+
+def check_all(path: str, categories: typing.Set[str],
+              check: typing.Callable[[str], typing.List[str]],
+              rule_version: int, checker: str,
+              path_to_cache: str = None,
+              shard: typing.Tuple[int, int] = (1, 1),
+              path_to_results: str = None,
+              jobs: int = 1) -> int:
+    """
+    Run a checker on all samples under a root folder (the --all mode), or on
+    one shard of them, and print the numbered errors.
+
+    :param path: The path to the samples root folder.
+    :param categories: The category folder names, see find_samples.
+    :param check: A function returning the list of errors for a sample.
+    :param rule_version: The checker's rule version.
+    :param checker: The name of the checker, recorded in the results file.
+    :param path_to_cache: The path to the results cache, or None to check
+    every sample without reading or writing a cache.
+    :param shard: A tuple of (i, N) to check only the i-th of N shards.
+    :param path_to_results: The path to write the results to as JSON, for
+    the merge command; None to not write them.
+    :param jobs: The number of processes checking samples, see run_checks.
+    :return: The number of errors.
+    """
+    samples = find_samples(path, categories)
+    positions = {sample: position for position, sample in enumerate(samples)}
+    shard_samples = [sample for sample in samples if in_shard(sample, path, shard)]
+    cache = load_cache(path_to_cache) if path_to_cache else None
+    results = run_checks(shard_samples, check, rule_version, cache, jobs)
+    for result in results:
+        result['position'] = positions[result['path']]
+    if path_to_cache:
+        shard_set = set(shard_samples)
+        save_cache(path_to_cache, results,
+                   [sample for sample in samples if sample not in shard_set])
+    if path_to_results:
+        save_results(path_to_results, checker, shard, len(samples), results)
+    return print_results(results)
+
+
+def merge_results(paths_to_results: typing.List[str]) -> int:
+    """
+    Combine the results files of all shards into one report. The errors are
+    numbered in the order an unsharded run prints them, per checker.
+
+    :param paths_to_results: The paths to the JSON files written by the shards.
+    :return: The number of errors. Throws if a shard is missing or repeated,
+    or the shards don't add up to the same samples.
+    """
+    # checker name -> list of results files, in the order they are given
+    checkers = {}
+    for path_to_results in paths_to_results:
+        try:
+            with open(path_to_results, 'r') as results_file:
+                data = json.load(results_file)
+        except Exception as err:
+            raise Exception(f'Error reading results - {path_to_results} - {err}')
+        checkers.setdefault(data['checker'], []).append(data)
+
+    total = 0
+    for checker, shards in checkers.items():
+        shard_counts = set(data['shard'][1] for data in shards)
+        shard_indexes = sorted(data['shard'][0] for data in shards)
+        if len(shard_counts) != 1 or shard_indexes != list(range(1, shard_counts.pop() + 1)):
+            got = ', '.join(f'{i}/{n}' for i, n in sorted(tuple(data['shard']) for data in shards))
+            raise Exception(f'Error incomplete shards - {checker} - got {got}')
+        sample_counts = set(data['sample_count'] for data in shards)
+        results = sorted((result for data in shards for result in data['samples']),
+                         key=lambda result: result['position'])
+        positions = [result['position'] for result in results]
+        if len(sample_counts) != 1 or positions != list(range(sample_counts.pop())):
+            raise Exception(f'Error mismatched shards - {checker} - the shards '
+                            f'were not run on the same samples')
+        if len(checkers) > 1:
+            print(f'**** {checker} ****')
+        total += print_results(results)
+    return total
+
+
+def main():
+    msg = 'Merge the JSON results of sharded README_style_checker or ' \
+          'metadata_style_checker runs (--shard i/N --results {path}). ' \
+          'On success: Script will exit with zero. ' \
+          'On failure: The errors of all shards print to console and the ' \
+          'script will exit with non-zero code.'
+    parser = argparse.ArgumentParser(description=msg)
+    parser.add_argument('command', choices=['merge'], help='merge the results of all shards')
+    parser.add_argument('results', nargs='+', help='paths to the results of every shard')
+    args = parser.parse_args()
+
+    if merge_results(args.results) > 0:
+        raise Exception('Error(s) occurred during checking all samples.')
+# endregion
+
+
+if __name__ == '__main__':
+    try:
+        main()
+    except Exception as error:
+        print(f'{error}')
+        exit(1)
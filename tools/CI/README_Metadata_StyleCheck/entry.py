@@ -1,9 +1,15 @@
 #!/usr/bin/env python3
 
+import io
 import os
 import json
 import argparse
-import subprocess as sp
+import contextlib
+from concurrent.futures import ProcessPoolExecutor
+
+import README_style_checker
+import metadata_style_checker
+import markdown_style_checker
 
 # A set of category folder names in current sample viewer.
 # Only run the checks when a file path is within one of these category folders.
@@ -29,18 +35,66 @@ categories = {
 }
 
 
-def run_mdl(readme_path: str):
-    print("**** mdl ****")
-    code = sp.call(f'mdl --style /style.rb "{readme_path}"', shell=True)
-    return code
-
-
-def run_style_check(dirname: str):
-    print("**** README_style_checker ****")
-    code1 = sp.call(f'python3 /README_style_checker.py -s "{dirname}"', shell=True)
-    print("**** metadata_style_checker ****")
-    code2 = sp.call(f'python3 /metadata_style_checker.py -s "{dirname}"', shell=True)
-    return code1 + code2
+def run_markdown_check(readme_path: str):
+    print("**** markdown_style_checker ****")
+    try:
+        files_with_errors = markdown_style_checker.print_results(markdown_style_checker.lint_files([readme_path]))
+    except Exception as err:
+        print(f'{err}')
+        return 1
+    return 1 if files_with_errors else 0
+
+
+def run_style_check(dirname: str) -> (str, int):
+    """
+    Run the README and metadata style checks on a sample folder in-process.
+
+    :param dirname: The path to the sample folder.
+    :return: The output of the checks, and the number of checks that failed.
+    """
+    output = io.StringIO()
+    code = 0
+    with contextlib.redirect_stdout(output):
+        print("**** README_style_checker ****")
+        try:
+            README_style_checker.single(dirname)
+        except Exception as err:
+            print(f'{err}')
+            code += 1
+        print("**** metadata_style_checker ****")
+        try:
+            metadata_style_checker.compare_one_metadata(dirname)
+        except Exception as err:
+            print(f'{err}')
+            code += 1
+    return output.getvalue(), code
+
+
+def get_sample_dir(path: str):
+    """
+    Get the sample folder of a changed README or metadata file.
+
+    :param path: The path of a changed file.
+    :return: The path to the sample folder, or None if the file is not a
+    sample's README or metadata file.
+    """
+    path_parts = os.path.normpath(path).split(os.path.sep)
+    if len(path_parts) < 7:
+        # A file not in samples folder, omit.
+        # E.g. might be in the root folder or other unrelated folders.
+        return None
+
+    # Only run checks on folders that is within a category.
+    if path_parts[-3] not in categories:
+        # Folder name is not a category, omit.
+        return None
+
+    # Changed file is not a README or metadata file, omit.
+    l_name = os.path.basename(path).lower()
+    if l_name != 'readme.md' and l_name != 'readme.metadata.json':
+        return None
+
+    return os.path.dirname(path)
 
 
 def read_json(filenames_json_data):
@@ -78,6 +132,17 @@ def main():
         exit(1)
 
     return_code = 0
+
+    # Run the Python checks on every changed sample up front, on a process
+    # pool; results are printed in order as the samples come up below.
+    sample_dirs = [get_sample_dir(f) for f in files if os.path.exists(f)]
+    sample_dirs = list(dict.fromkeys(d for d in sample_dirs if d is not None))
+    if len(sample_dirs) > 1:
+        with ProcessPoolExecutor() as executor:
+            style_check_results = dict(zip(sample_dirs, executor.map(run_style_check, sample_dirs)))
+    else:
+        style_check_results = {dir_path: run_style_check(dir_path) for dir_path in sample_dirs}
+
     # A set of dirname strings to avoid duplicate checks on the same sample.
     samples_set = set()
 
@@ -87,26 +152,14 @@ def main():
             print("file doesn't exist: " + f)
             continue
 
-        path_parts = os.path.normpath(f).split(os.path.sep)
-        if len(path_parts) < 7:
-            # A file not in samples folder, omit.
-            # E.g. might be in the root folder or other unrelated folders.
+        dir_path = get_sample_dir(f)
+        if dir_path is None:
             continue
 
-        # Only run checks on folders that is within a category.
-        if path_parts[-3] not in categories:
-            # Folder name is not a category, omit.
-            continue
-        
-        # Get filename and folder name of the changed sample.
+        # Get filename of the changed file.
         filename = os.path.basename(f)
-        dir_path = os.path.dirname(f)
         l_name = filename.lower()
 
-        # Changed file is not a README or metadata file, omit.
-        if l_name != 'readme.md' and l_name != 'readme.metadata.json':
-            continue
-
         # Print debug information for current sample.
         if dir_path not in samples_set:
             print(f'*** Checking {dir_path} ***')
@@ -120,15 +173,17 @@ def main():
             print(f'Error: {dir_path} filename has wrong capitalization')
             return_code += 1
 
-        # Run the markdownlint linter on README file.
+        # Run the markdown linter on README file.
         if filename == 'readme.md':
             # Run the linter on markdown file.
-            return_code += run_mdl(f)
+            return_code += run_markdown_check(f)
 
-        # Run the other Python checks on the whole sample folder.
+        # Report the other Python checks on the whole sample folder.
         if dir_path not in samples_set:
             samples_set.add(dir_path)
-            return_code += run_style_check(dir_path)
+            output, code = style_check_results[dir_path]
+            print(output, end='')
+            return_code += code
 
     if return_code != 0:
         # Non-zero code occurred during the process.
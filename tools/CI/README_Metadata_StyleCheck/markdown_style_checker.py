@@ -0,0 +1,747 @@
+#!/usr/bin/env python3
+
+import os
+import re
+import sys
+import typing
+import argparse
+
+# Shared sample tools live in tools/metadata_tools. In the CI container this
+# script runs from '/', so also look in the checked-out workspace.
+sys.path.append(os.path.join(os.path.dirname(os.path.realpath(__file__)), '..', '..', 'metadata_tools'))
+sys.path.append(os.path.join('.', 'tools', 'metadata_tools'))
+from sample_index import get_index
+
+# region Rule configuration
+# The markdownlint (mdl) rules, as configured for this repo. All rules are
+# enabled except the excluded ones, with these parameters:
+# MD003 - Header style written as non-closing pound marks. e.g. ## Section title
+header_style = 'atx'
+# MD004 - Unordered list style as asterisk, rather than hyphen or plus sign
+unordered_list_marker = '*'
+# MD009 - Allows an exception for 2 trailing spaces used to insert an explicit line break
+br_spaces = 2
+# MD026 - Punctuation that headers should not end with (mdl default)
+header_punctuation = '.,;:!?'
+# MD029 - Ordered list item prefix is incremental, rather than all ones
+# MD030 - Number of spaces after list markers (mdl default)
+list_marker_spaces = 1
+# MD013 - Not limiting line length
+# MD007 - Not limiting unordered list indentation, tab, 2 or 4 spaces are all fine
+excluded_rules = {'MD013', 'MD007'}
+
+# Rule IDs and their descriptions, as printed by mdl.
+rule_descriptions = {
+    'MD001': 'Header levels should only increment by one level at a time',
+    'MD002': 'First header should be a top level header',
+    'MD003': 'Header style',
+    'MD004': 'Unordered list style',
+    'MD005': 'Inconsistent indentation for list items at the same level',
+    'MD006': 'Consider starting bulleted lists at the beginning of the line',
+    'MD007': 'Unordered list indentation',
+    'MD009': 'Trailing spaces',
+    'MD010': 'Hard tabs',
+    'MD011': 'Reversed link syntax',
+    'MD012': 'Multiple consecutive blank lines',
+    'MD013': 'Line length',
+    'MD014': 'Dollar signs used before commands without showing output',
+    'MD018': 'No space after hash on atx style header',
+    'MD019': 'Multiple spaces after hash on atx style header',
+    'MD020': 'No space inside hashes on closed atx style header',
+    'MD021': 'Multiple spaces inside hashes on closed atx style header',
+    'MD022': 'Headers should be surrounded by blank lines',
+    'MD023': 'Headers must start at the beginning of the line',
+    'MD024': 'Multiple headers with the same content',
+    'MD025': 'Multiple top level headers in the same document',
+    'MD026': 'Trailing punctuation in header',
+    'MD027': 'Multiple spaces after blockquote symbol',
+    'MD028': 'Blank line inside blockquote',
+    'MD029': 'Ordered list item prefix',
+    'MD030': 'Spaces after list markers',
+    'MD031': 'Fenced code blocks should be surrounded by blank lines',
+    'MD032': 'Lists should be surrounded by blank lines',
+    'MD033': 'Inline HTML',
+    'MD034': 'Bare URL used',
+    'MD035': 'Horizontal rule style',
+    'MD036': 'Emphasis used instead of a header',
+    'MD037': 'Spaces inside emphasis markers',
+    'MD038': 'Spaces inside code span elements',
+    'MD039': 'Spaces inside link text',
+    'MD040': 'Fenced code blocks should have a language specified',
+    'MD041': 'First line in file should be a top level header',
+    'MD046': 'Code block style',
+    'MD047': 'File should end with a single newline character'
+}
+
+rules_url = 'https://github.com/markdownlint/markdownlint/blob/master/docs/RULES.md'
+# endregion
+
+# region Patterns
+fence_pattern = re.compile(r'^(`{3,}|~{3,})')
+atx_header_pattern = re.compile(r'^(#{1,6})[\t ]*([^ \t].*)$')
+setext_underline_pattern = re.compile(r'^(=+|-+)\s*$')
+hr_pattern = re.compile(r'^ {0,3}(?:(?:\*[ \t]*){3,}|(?:-[ \t]*){3,}|(?:_[ \t]*){3,})$')
+list_item_pattern = re.compile(r'^( *)([*+-]|\d+\.)([ \t]+)(\S.*)$')
+blockquote_pattern = re.compile(r'^\s*>')
+html_block_pattern = re.compile(r'^ {0,3}<[A-Za-z]')
+link_definition_pattern = re.compile(r'^ {0,3}\[[^\]]+\]:\s*\S')
+code_span_pattern = re.compile(r'(`+)(.+?)(?<!`)\1(?!`)')
+escaped_char_pattern = re.compile(r'\\(.)')
+image_pattern = re.compile(r'!\[[^\]]*\](?:\([^)]*\)|\[[^\]]*\])')
+link_pattern = re.compile(r'\[[^\]]*\](?:\([^)]*\)|\[[^\]]*\])')
+link_text_pattern = re.compile(r'(?<!!)\[([^\[\]]*)\](?:\(|\[)')
+autolink_pattern = re.compile(r'<(?:https?|ftp|mailto):[^>\s]*>')
+html_tag_pattern = re.compile(r'</?[A-Za-z][\w:.-]*(?:\s[^<>]*)?/?>')
+html_open_tag_pattern = re.compile(r'<[A-Za-z][\w:.-]*(?:\s[^<>]*)?/?>')
+# endregion
+
+
+# region Markdown document
+class MarkdownDocument:
+    """
+    The blocks of a markdown file that the rules look at: code blocks,
+    headers, lists, horizontal rules, block quotes and the text of every
+    other line. Line numbers are 1-based, as in mdl's output.
+    """
+
+    def __init__(self, contents: str):
+        # A byte order mark is not part of the first line.
+        self.contents = contents[1:] if contents.startswith('\ufeff') else contents
+        self.lines = self.contents.split('\n')
+        # Trailing empty lines are not part of the document, as in mdl.
+        while self.lines and self.lines[-1] == '':
+            self.lines.pop()
+
+        # Line numbers inside code blocks, including fences.
+        self.code_lines = set()
+        # (first line, fenced, language, content lines)
+        self.code_blocks = []
+        # (line, level, style, text)
+        self.headers = []
+        # Each list is a dict with 'ordered', 'depth' and 'items', where
+        # items are (line, indent, marker, spaces after marker).
+        self.lists = []
+        self.hr_lines = []
+        self.blockquote_lines = []
+        # Lines of paragraphs that are not inside a list.
+        self.paragraph_lines = []
+        # Line -> text after the block markup (header pound marks, list
+        # markers, quote marks) is removed.
+        self.text = {}
+
+        self.parse()
+
+    def is_blank(self, index: int) -> bool:
+        return index < 0 or index >= len(self.lines) or not self.lines[index].strip()
+
+    def parse(self) -> None:
+        """
+        Walk the lines once, classifying each line.
+        """
+        lines = self.lines
+        list_stack = []
+        # True when the previous line ended a block, so a new block can start.
+        block_start = True
+        index = 0
+        while index < len(lines):
+            line = lines[index]
+            linenum = index + 1
+            stripped = line.strip()
+
+            # Fenced code blocks.
+            fence = fence_pattern.match(stripped)
+            if fence:
+                if list_stack and not line.startswith(' ') and self.is_blank(index - 1):
+                    list_stack = []
+                language = stripped[len(fence.group(1)):].strip()
+                content = []
+                self.code_lines.add(linenum)
+                index += 1
+                while index < len(lines):
+                    self.code_lines.add(index + 1)
+                    closing = fence_pattern.match(lines[index].strip())
+                    if closing and closing.group(1)[0] == fence.group(1)[0] \
+                            and len(closing.group(1)) >= len(fence.group(1)) \
+                            and not lines[index].strip()[len(closing.group(1)):].strip():
+                        break
+                    content.append(lines[index])
+                    index += 1
+                self.code_blocks.append((linenum, True, language, content))
+                index += 1
+                block_start = True
+                continue
+
+            if not stripped:
+                index += 1
+                block_start = True
+                continue
+
+            # Indented code blocks, outside of lists.
+            if not list_stack and block_start and (line.startswith('    ') or line.startswith('\t')):
+                content = []
+                first = linenum
+                while index < len(lines) and (lines[index].startswith('    ') or lines[index].startswith('\t') or not lines[index].strip()):
+                    content.append(lines[index])
+                    index += 1
+                while content and not content[-1].strip():
+                    content.pop()
+                    index -= 1
+                self.code_lines.update(range(first, first + len(content)))
+                self.code_blocks.append((first, False, '', content))
+                block_start = False
+                continue
+
+            # Block quotes.
+            if blockquote_pattern.match(line):
+                list_stack = []
+                self.blockquote_lines.append(linenum)
+                self.text[linenum] = re.sub(r'^\s*(?:>\s?)+', '', line)
+                index += 1
+                block_start = False
+                continue
+
+            # ATX headers.
+            header = atx_header_pattern.match(line)
+            if header:
+                list_stack = []
+                text = re.sub(r'[ \t]+#+[ \t]*$|^#+[ \t]*$', '', header.group(2)).strip()
+                style = 'atx_closed' if stripped.endswith('#') else 'atx'
+                self.headers.append((linenum, len(header.group(1)), style, text))
+                self.text[linenum] = text
+                index += 1
+                block_start = True
+                continue
+
+            # Horizontal rules.
+            if block_start and hr_pattern.match(line):
+                list_stack = []
+                self.hr_lines.append(linenum)
+                index += 1
+                block_start = True
+                continue
+
+            # List items.
+            item = list_item_pattern.match(line)
+            if item and (list_stack or block_start):
+                indent = len(item.group(1))
+                marker = item.group(2)
+                spaces = item.group(3)
+                ordered = marker[0].isdigit()
+                content_indent = indent + len(marker) + len(spaces)
+                while len(list_stack) > 1 and indent < list_stack[-2]['content_indent']:
+                    list_stack.pop()
+                if not list_stack or indent >= list_stack[-1]['content_indent']:
+                    new_list = {'ordered': ordered, 'depth': len(list_stack), 'items': []}
+                    self.lists.append(new_list)
+                    list_stack.append(new_list)
+                elif list_stack[-1]['ordered'] != ordered:
+                    # A different kind of marker starts a new list.
+                    new_list = {'ordered': ordered, 'depth': list_stack[-1]['depth'], 'items': []}
+                    self.lists.append(new_list)
+                    list_stack[-1] = new_list
+                list_stack[-1]['content_indent'] = content_indent
+                list_stack[-1]['items'].append((linenum, indent, marker, spaces))
+                self.text[linenum] = item.group(4)
+                index += 1
+                block_start = False
+                continue
+
+            # A line that isn't indented ends a list after a blank line.
+            if list_stack and self.is_blank(index - 1) and not line.startswith((' ', '\t')):
+                list_stack = []
+
+            # Setext headers.
+            if not list_stack and block_start and index + 1 < len(lines) \
+                    and setext_underline_pattern.match(lines[index + 1]):
+                level = 1 if lines[index + 1].lstrip().startswith('=') else 2
+                self.headers.append((linenum, level, 'setext', stripped))
+                self.text[linenum] = stripped
+                index += 2
+                block_start = True
+                continue
+
+            # Link definitions and HTML blocks carry no text.
+            if not link_definition_pattern.match(line):
+                self.text[linenum] = line
+                if not list_stack and not html_block_pattern.match(line):
+                    self.paragraph_lines.append(linenum)
+            index += 1
+            block_start = False
+
+    def get_text_lines(self) -> typing.List[typing.Tuple[int, str]]:
+        """
+        Get the plain text of each line, without code spans, links, images and
+        HTML, as mdl does when matching text elements.
+
+        :return: A list of (line number, text) tuples.
+        """
+        results = []
+        for linenum in sorted(self.text):
+            text = code_span_pattern.sub('', self.text[linenum])
+            text = image_pattern.sub('', text)
+            text = link_pattern.sub('', text)
+            text = autolink_pattern.sub('', text)
+            text = html_tag_pattern.sub('', text)
+            text = escaped_char_pattern.sub(r'\1', text)
+            results.append((linenum, text))
+        return results
+
+    def get_span_lines(self) -> typing.List[typing.Tuple[int, str]]:
+        """
+        Get the text of each line with code spans removed, but links, images
+        and HTML left in place.
+
+        :return: A list of (line number, text) tuples.
+        """
+        return [(linenum, code_span_pattern.sub('', self.text[linenum])) for linenum in sorted(self.text)]
+# endregion
+
+
+# region Rules
+def md001(doc: MarkdownDocument) -> typing.List[int]:
+    errors = []
+    old_level = None
+    for linenum, level, _, _ in doc.headers:
+        if old_level is not None and level > old_level + 1:
+            errors.append(linenum)
+        old_level = level
+    return errors
+
+
+def md002(doc: MarkdownDocument) -> typing.List[int]:
+    if doc.headers and doc.headers[0][1] != 1:
+        return [doc.headers[0][0]]
+    return []
+
+
+def md003(doc: MarkdownDocument) -> typing.List[int]:
+    return [linenum for linenum, _, style, _ in doc.headers if style != header_style]
+
+
+def md004(doc: MarkdownDocument) -> typing.List[int]:
+    errors = []
+    for l in doc.lists:
+        if not l['ordered']:
+            errors += [linenum for linenum, _, marker, _ in l['items'] if marker != unordered_list_marker]
+    return errors
+
+
+def md005(doc: MarkdownDocument) -> typing.List[int]:
+    errors = []
+    for l in doc.lists:
+        first_indent = l['items'][0][1]
+        errors += [linenum for linenum, indent, _, _ in l['items'] if indent != first_indent]
+    return errors
+
+
+def md006(doc: MarkdownDocument) -> typing.List[int]:
+    return [l['items'][0][0] for l in doc.lists
+            if not l['ordered'] and l['depth'] == 0 and l['items'][0][1] > 0]
+
+
+def md009(doc: MarkdownDocument) -> typing.List[int]:
+    errors = []
+    for index, line in enumerate(doc.lines):
+        if re.search(r'\s$', line) and not re.search(r'\S\s{%d}$' % br_spaces, line):
+            errors.append(index + 1)
+    return errors
+
+
+def md010(doc: MarkdownDocument) -> typing.List[int]:
+    return [index + 1 for index, line in enumerate(doc.lines) if '\t' in line]
+
+
+def md011(doc: MarkdownDocument) -> typing.List[int]:
+    return [linenum for linenum, text in doc.get_text_lines() if re.search(r'\([^)]+\)\[[^\]]+\]', text)]
+
+
+def md012(doc: MarkdownDocument) -> typing.List[int]:
+    errors = []
+    for index in range(1, len(doc.lines)):
+        if not doc.lines[index].strip() and not doc.lines[index - 1].strip() \
+                and index + 1 not in doc.code_lines:
+            errors.append(index + 1)
+    return errors
+
+
+def md014(doc: MarkdownDocument) -> typing.List[int]:
+    errors = []
+    for linenum, _, _, content in doc.code_blocks:
+        content_lines = [line for line in content if line]
+        if content_lines and all(re.match(r'^\s*\$\s', line) for line in content_lines):
+            errors.append(linenum)
+    return errors
+
+
+def md018(doc: MarkdownDocument) -> typing.List[int]:
+    return [linenum for linenum, _, style, _ in doc.headers
+            if style == 'atx' and re.match(r'^#+[^#\s]', doc.lines[linenum - 1])]
+
+
+def md019(doc: MarkdownDocument) -> typing.List[int]:
+    return [linenum for linenum, _, style, _ in doc.headers
+            if style in ('atx', 'atx_closed') and re.match(r'^#+\s\s', doc.lines[linenum - 1])]
+
+
+def md020(doc: MarkdownDocument) -> typing.List[int]:
+    return [linenum for linenum, _, style, _ in doc.headers
+            if style == 'atx_closed' and (re.match(r'^#+[^#\s]', doc.lines[linenum - 1])
+                                          or re.search(r'[^#\s]#+\s*$', doc.lines[linenum - 1]))]
+
+
+def md021(doc: MarkdownDocument) -> typing.List[int]:
+    return [linenum for linenum, _, style, _ in doc.headers
+            if style == 'atx_closed' and (re.match(r'^#+\s\s', doc.lines[linenum - 1])
+                                          or re.search(r'\s\s#+\s*$', doc.lines[linenum - 1]))]
+
+
+def md022(doc: MarkdownDocument) -> typing.List[int]:
+    errors = []
+    for linenum, _, style, _ in doc.headers:
+        bad = linenum > 1 and doc.lines[linenum - 2] != ''
+        next_index = linenum + 1 if style == 'setext' else linenum
+        if next_index < len(doc.lines) and doc.lines[next_index] != '':
+            bad = True
+        if bad:
+            errors.append(linenum)
+    return errors
+
+
+def md023(doc: MarkdownDocument) -> typing.List[int]:
+    errors = [linenum for linenum, _, _, _ in doc.headers if re.match(r'^\s', doc.lines[linenum - 1])]
+    errors += [linenum for linenum in doc.paragraph_lines if re.match(r'^\s+#', doc.lines[linenum - 1])]
+    return errors
+
+
+def md024(doc: MarkdownDocument) -> typing.List[int]:
+    seen = set()
+    errors = []
+    for linenum, _, _, text in doc.headers:
+        if text in seen:
+            errors.append(linenum)
+        seen.add(text)
+    return errors
+
+
+def md025(doc: MarkdownDocument) -> typing.List[int]:
+    top_level = [linenum for linenum, level, _, _ in doc.headers if level == 1]
+    if top_level and top_level[0] == 1:
+        return top_level[1:]
+    return []
+
+
+def md026(doc: MarkdownDocument) -> typing.List[int]:
+    return [linenum for linenum, _, _, text in doc.headers
+            if text and text[-1] in header_punctuation]
+
+
+def md027(doc: MarkdownDocument) -> typing.List[int]:
+    return [linenum for linenum in doc.blockquote_lines
+            if re.match(r'^\s*(?:>\s?)*>\s{2,}\S', doc.lines[linenum - 1])]
+
+
+def md028(doc: MarkdownDocument) -> typing.List[int]:
+    errors = []
+    quotes = set(doc.blockquote_lines)
+    for linenum in doc.blockquote_lines:
+        if linenum - 1 in quotes or linenum - 1 < 1 or doc.lines[linenum - 2].strip():
+            continue
+        # Look back over the blank lines for the end of another block quote.
+        previous = linenum - 1
+        while previous >= 1 and not doc.lines[previous - 1].strip():
+            previous -= 1
+        if previous in quotes:
+            errors.append(linenum - 1)
+    return errors
+
+
+def md029(doc: MarkdownDocument) -> typing.List[int]:
+    errors = []
+    for l in doc.lists:
+        if l['ordered']:
+            for position, (linenum, _, _, _) in enumerate(l['items']):
+                if not doc.lines[linenum - 1].strip().startswith(f'{position + 1}. '):
+                    errors.append(linenum)
+    return errors
+
+
+def md030(doc: MarkdownDocument) -> typing.List[int]:
+    errors = []
+    for l in doc.lists:
+        errors += [linenum for linenum, _, _, spaces in l['items'] if len(spaces) != list_marker_spaces]
+    return errors
+
+
+def md031(doc: MarkdownDocument) -> typing.List[int]:
+    # Examine the lines directly, as mdl does.
+    errors = []
+    in_code = False
+    fence = None
+    lines = [''] + doc.lines + ['']
+    for linenum, line in enumerate(lines):
+        match = fence_pattern.match(line.strip())
+        if not match or (in_code and not match.group(1).startswith(fence)):
+            continue
+        fence = None if in_code else match.group(1)
+        in_code = not in_code
+        if (in_code and lines[linenum - 1] != '') or (not in_code and lines[linenum + 1] != ''):
+            errors.append(linenum)
+    return errors
+
+
+def md032(doc: MarkdownDocument) -> typing.List[int]:
+    # Examine the lines directly, as mdl does.
+    errors = []
+    in_list = False
+    in_code = False
+    fence = None
+    prev_line = ''
+    for index, line in enumerate(doc.lines):
+        if line.strip() == '{:toc}':
+            continue
+        if not in_code:
+            list_marker = re.match(r'^([*+-]|(\d+\.))\s', line.strip())
+            if list_marker and not in_list and not re.match(r'^($|\s)', prev_line):
+                errors.append(index + 1)
+            elif not list_marker and in_list and not re.match(r'^($|\s)', line):
+                errors.append(index)
+            in_list = bool(list_marker)
+        match = fence_pattern.match(line.strip())
+        if match and (not in_code or match.group(1).startswith(fence)):
+            fence = None if in_code else match.group(1)
+            in_code = not in_code
+            in_list = False
+        prev_line = line
+    return errors
+
+
+def md033(doc: MarkdownDocument) -> typing.List[int]:
+    errors = []
+    for linenum, text in doc.get_span_lines():
+        if html_open_tag_pattern.search(autolink_pattern.sub('', text)):
+            errors.append(linenum)
+    return errors
+
+
+def md034(doc: MarkdownDocument) -> typing.List[int]:
+    return [linenum for linenum, text in doc.get_text_lines() if re.search(r'https?://', text)]
+
+
+def md035(doc: MarkdownDocument) -> typing.List[int]:
+    if not doc.hr_lines:
+        return []
+    style = doc.lines[doc.hr_lines[0] - 1]
+    return [linenum for linenum in doc.hr_lines if doc.lines[linenum - 1] != style]
+
+
+def md036(doc: MarkdownDocument) -> typing.List[int]:
+    errors = []
+    paragraph_lines = set(doc.paragraph_lines)
+    for linenum in doc.paragraph_lines:
+        # A single line paragraph made of just emphasis, without punctuation.
+        if linenum - 1 in paragraph_lines or linenum + 1 in paragraph_lines:
+            continue
+        match = re.match(r'^(\*\*|__|\*|_)([^*_`\[]+)\1$', doc.lines[linenum - 1].strip())
+        if match and not match.group(2)[-1] in header_punctuation:
+            errors.append(linenum)
+    return errors
+
+
+def md037(doc: MarkdownDocument) -> typing.List[int]:
+    return [linenum for linenum, text in doc.get_text_lines()
+            if re.search(r'\s(\*\*?|__?)\s.+\1', text) or re.search(r'(\*\*?|__?).+\s\1\s', text)]
+
+
+def md038(doc: MarkdownDocument) -> typing.List[int]:
+    errors = []
+    for linenum in sorted(doc.text):
+        for match in code_span_pattern.finditer(doc.text[linenum]):
+            content = match.group(2)
+            # A single space may pad code that starts or ends with a backtick.
+            if '`' in content and re.match(r'^ \S.*\S $|^ \S $', content):
+                continue
+            if content != content.strip():
+                errors.append(linenum)
+                break
+    return errors
+
+
+def md039(doc: MarkdownDocument) -> typing.List[int]:
+    errors = []
+    for linenum, text in doc.get_span_lines():
+        for match in link_text_pattern.finditer(text):
+            link_text = match.group(1)
+            if link_text and link_text != link_text.strip():
+                errors.append(linenum)
+                break
+    return errors
+
+
+def md040(doc: MarkdownDocument) -> typing.List[int]:
+    return [linenum for linenum, fenced, language, _ in doc.code_blocks if fenced and not language]
+
+
+def md041(doc: MarkdownDocument) -> typing.List[int]:
+    if not doc.headers or doc.headers[0][0] != 1 or doc.headers[0][1] != 1:
+        return [1]
+    return []
+
+
+def md046(doc: MarkdownDocument) -> typing.List[int]:
+    # Code blocks should be fenced.
+    return [linenum for linenum, fenced, _, _ in doc.code_blocks if not fenced]
+
+
+def md047(doc: MarkdownDocument) -> typing.List[int]:
+    # Only a missing newline is reported; extra blank lines at the end are
+    # not part of the document, as in mdl.
+    if doc.lines and not doc.contents.endswith('\n'):
+        return [len(doc.lines)]
+    return []
+
+
+rules = {
+    'MD001': md001,
+    'MD002': md002,
+    'MD003': md003,
+    'MD004': md004,
+    'MD005': md005,
+    'MD006': md006,
+    'MD009': md009,
+    'MD010': md010,
+    'MD011': md011,
+    'MD012': md012,
+    'MD014': md014,
+    'MD018': md018,
+    'MD019': md019,
+    'MD020': md020,
+    'MD021': md021,
+    'MD022': md022,
+    'MD023': md023,
+    'MD024': md024,
+    'MD025': md025,
+    'MD026': md026,
+    'MD027': md027,
+    'MD028': md028,
+    'MD029': md029,
+    'MD030': md030,
+    'MD031': md031,
+    'MD032': md032,
+    'MD033': md033,
+    'MD034': md034,
+    'MD035': md035,
+    'MD036': md036,
+    'MD037': md037,
+    'MD038': md038,
+    'MD039': md039,
+    'MD040': md040,
+    'MD041': md041,
+    'MD046': md046,
+    'MD047': md047
+}
+# endregion
+
+
+# region Main wrapper functions
+def lint_contents(contents: str) -> typing.List[typing.Tuple[int, str]]:
+    """
+    Run all enabled rules on markdown text.
+
+    :param contents: The markdown text.
+    :return: A list of (line number, rule ID) tuples, ordered by rule and
+    then by line, as mdl reports them.
+    """
+    doc = MarkdownDocument(contents)
+    errors = []
+    for rule_id in sorted(rules):
+        if rule_id in excluded_rules:
+            continue
+        errors += [(linenum, rule_id) for linenum in sorted(set(rules[rule_id](doc)))]
+    return errors
+
+
+def lint_file(path: str) -> typing.List[str]:
+    """
+    Lint a single markdown file.
+
+    :param path: The path to the markdown file.
+    :return: A list of error messages in mdl's format. Throws if the file
+    can't be read.
+    """
+    with open(path, 'r') as markdown_file:
+        contents = markdown_file.read()
+    return [f'{path}:{linenum}: {rule_id} {rule_descriptions[rule_id]}'
+            for linenum, rule_id in lint_contents(contents)]
+
+
+def lint_files(paths: typing.List[str]) -> typing.List[typing.Tuple[str, typing.List[str]]]:
+    """
+    Lint many markdown files in one pass.
+
+    :param paths: The paths to the markdown files.
+    :return: A list of (path, error messages) tuples, in input order.
+    """
+    return [(path, lint_file(path)) for path in paths]
+
+
+def print_results(results: typing.List[typing.Tuple[str, typing.List[str]]]) -> int:
+    """
+    Print lint results the way mdl does.
+
+    :param results: A list of (path, error messages) tuples.
+    :return: The number of files with errors.
+    """
+    files_with_errors = 0
+    for path, messages in results:
+        for message in messages:
+            print(message)
+        if messages:
+            files_with_errors += 1
+    if files_with_errors:
+        print(f'\nA detailed description of the rules is available at {rules_url}')
+    return files_with_errors
+
+
+def all_readmes(path: str) -> typing.List[str]:
+    """
+    Find the README files of all samples under a folder.
+
+    :param path: The path to the root folder.
+    :return: A sorted list of README paths.
+    """
+    index = get_index(path)
+    results = []
+    for root, dirs, files in index.walk(path):
+        if 'readme.md' in files:
+            results.append(os.path.join(root, 'readme.md'))
+    return sorted(results)
+
+
+def main():
+    msg = 'Markdown style checker script, following the markdownlint (mdl) ' \
+          'rules configured for this repo. Run it against the root folder ' \
+          'or a single markdown file. ' \
+          'On success: Script will exit with zero. ' \
+          'On failure: Style violations will print to console and the script ' \
+          'will exit with non-zero code.'
+    parser = argparse.ArgumentParser(description=msg)
+    parser.add_argument('-a', '--all', help='path to project root folder')
+    parser.add_argument('-s', '--single', help='path to a markdown file')
+    args = parser.parse_args()
+    if args.all:
+        paths = all_readmes(args.all)
+    elif args.single:
+        paths = [args.single]
+    else:
+        raise Exception('Invalid arguments, abort.')
+    if print_results(lint_files(paths)):
+        exit(1)
+# endregion
+
+
+if __name__ == '__main__':
+    try:
+        main()
+    except Exception as error:
+        print(f'{error}')
+        exit(1)
@@ -2,10 +2,19 @@
 
 import os
 import re
+import sys
 import json
 import typing
 import argparse
 
+# Shared sample tools live in tools/metadata_tools. In the CI container this
+# script runs from '/', so also look in the checked-out workspace.
+sys.path.append(os.path.join(os.path.dirname(os.path.realpath(__file__)), '..', '..', 'metadata_tools'))
+sys.path.append(os.path.join('.', 'tools', 'metadata_tools'))
+from sample_index import cached_listdir
+from readme_parser import parse_readme
+import check_runner
+
 
 # region Global sets
 # A set of category folder names in current sample viewer.
@@ -30,6 +39,14 @@ categories = {
     'UtilityNetwork'
 }
 
+# The version of the checks below. Bump it whenever a check changes, so that
+# results cached by earlier runs of --all are not reused.
+rule_version = 1
+
+# Results of --all runs are cached next to this script by default.
+default_cache_path = os.path.join(os.path.dirname(os.path.realpath(__file__)),
+                                  '.metadata_style_check_cache.json')
+
 # endregion
 
 
@@ -46,55 +63,6 @@ def sub_special_char(string: str) -> str:
     return re.sub(regex, '', string)
 
 
-def parse_head(head_string: str) -> (str, str):
-    """
-    Parse the `Title` section of README file and get the title and description.
-
-    :param head_string: A string containing title, description and images.
-    :return: Stripped title and description strings.
-    """
-    parts = list(filter(bool, head_string.splitlines()))
-    if len(parts) < 3:
-        raise Exception('README description parse failure!')
-    title = parts[0].lstrip('# ').rstrip()
-    description = parts[1].strip()
-    return title, description
-
-
-def parse_apis(apis_string: str) -> typing.List[str]:
-    """
-    Parse the `Relevant API` section and get a list of APIs.
-
-    :param apis_string: A string containing all APIs.
-    :return: A sorted list of stripped API names.
-    """
-    apis = list(filter(bool, apis_string.splitlines()))
-    if not apis:
-        raise Exception('README Relevant API parse failure!')
-    return sorted([api.lstrip('*- ').rstrip() for api in apis])
-
-
-def parse_tags(tags_string: str) -> typing.List[str]:
-    """
-    Parse the `Tags` section and get a list of tags.
-
-    :param tags_string: A string containing all tags, with comma as delimiter.
-    :return: A sorted list of stripped tags.
-    """
-    tags = tags_string.split(',')
-    if not tags:
-        raise Exception('README Tags parse failure!')
-    return sorted([tag.strip() for tag in tags])
-
-def parse_offline_data(offline_data_string: str) -> typing.List[str]:
-
-    # extract any guids - these are AGOL items
-    regex = re.compile('[0-9a-f]{8}[0-9a-f]{4}[1-5][0-9a-f]{3}[89ab][0-9a-f]{3}[0-9a-f]{12}', re.I)
-    matches = re.findall(regex, offline_data_string)
-
-    return list(dict.fromkeys(matches))
-
-
 def get_folder_name_from_path(path: str, index: int = -1) -> str:
     """
     Get the folder name from a full path.
@@ -138,7 +106,7 @@ class MetadataCreator:
         :return: A list of c# source code filenames.
         """
         results = []
-        for file in os.listdir(self.folder_path):
+        for file in cached_listdir(self.folder_path):
             if os.path.splitext(file)[1] in ['.xaml', '.cs']:
                 results.append(file)
         if not results:
@@ -152,7 +120,7 @@ class MetadataCreator:
         :return: A list of image filenames.
         """
         results = []
-        for file in os.listdir(self.folder_path):
+        for file in cached_listdir(self.folder_path):
             if os.path.splitext(file)[1].lower() in ['.jpg']:
                 results.append(file)
         if not results:
@@ -169,30 +137,27 @@ class MetadataCreator:
         self.formal_name = pathparts[-2]
 
         try:
-            readme_file = open(self.readme_path, 'r')
-            # read the readme content into a string
-            readme_contents = readme_file.read()
+            readme = parse_readme(self.readme_path)
         except Exception as err:
             print(f"Error reading README - {self.readme_path} - {err}.")
             raise err
-        else:
-            readme_file.close()
 
-        # Use regex to split the README by exactly 2 pound marks, so that they
-        # are separated into paragraphs.
-        pattern = re.compile(r'^#{2}(?!#)\s(.*)', re.MULTILINE)
-        readme_parts = re.split(pattern, readme_contents)
+        readme_parts = readme.parts
         try:
-            api_section_index = readme_parts.index('Relevant API') + 1
-            tags_section_index = readme_parts.index('Tags') + 1
-            self.title, self.description = parse_head(readme_parts[0])
-            self.relevant_apis = parse_apis(readme_parts[api_section_index])
-            keywords = parse_tags(readme_parts[tags_section_index])
+            # Throws if the README is missing either section.
+            readme_parts.index('Relevant API')
+            readme_parts.index('Tags')
+            if readme.description is None:
+                raise Exception('README description parse failure!')
+            self.title, self.description = readme.title, readme.description
+            if not readme.apis:
+                raise Exception('README Relevant API parse failure!')
+            self.relevant_apis = sorted(readme.apis)
+            keywords = sorted(readme.tags)
             # De-duplicate API names in README's Tags section.
             self.keywords = [w for w in keywords if w not in self.relevant_apis]
-            if readme_parts.__contains__('Offline data'):
-                offline_data_section_index = readme_parts.index('Offline data') + 1
-                self.offline_data = parse_offline_data(readme_parts[offline_data_section_index])
+            if 'Offline data' in readme.headers:
+                self.offline_data = list(readme.offline_data)
 
         except Exception as err:
             print(f'Error parsing README - {self.readme_path} - {err}.')
@@ -277,30 +242,41 @@ def compare_one_metadata(folder_path: str):
         raise Exception(f'Error inconsistent metadata - {folder_path}')
 
 
-def all_samples(path: str):
+def get_errors(folder_path: str) -> typing.List[str]:
+    """
+    Run the check on a sample folder.
+
+    :param folder_path: The path to the sample folder.
+    :return: The error messages; empty if the metadata is consistent.
+    """
+    try:
+        compare_one_metadata(folder_path)
+    except Exception as err:
+        return [f'{err}']
+    return []
+
+
+def all_samples(path: str, path_to_cache: str = None,
+                shard: typing.Tuple[int, int] = (1, 1),
+                path_to_results: str = None, jobs: int = 1):
     """
     Run the check on all samples.
 
     :param path: The path to 'arcgis-ios-sdk-samples' folder.
+    :param path_to_cache: The path to the results cache, or None to check
+    every sample without reading or writing a cache.
+    :param shard: A tuple of (i, N) to check only the i-th of N shards of
+    the samples; see check_runner.in_shard.
+    :param path_to_results: The path to write the results to as JSON, for
+    'check_runner.py merge'; None to not write them.
+    :param jobs: The number of processes checking samples; errors are printed
+    in the same order whatever the number.
     :return: None. Throws if exception occurs.
     """
-    exception_count = 0
-    for root, dirs, files in os.walk(path):
-        # Get parent folder name.
-        parent_folder_name = get_folder_name_from_path(root)
-        # If parent folder name is a valid category name.
-        if parent_folder_name in categories:
-            for dir_name in dirs:
-                sample_path = os.path.join(root, dir_name)
-                # Omit empty folders - they are omitted by Git.
-                if len([f for f in os.listdir(sample_path)
-                        if not f.startswith('.DS_Store')]) == 0:
-                    continue
-                try:
-                    compare_one_metadata(sample_path)
-                except Exception as err:
-                    exception_count += 1
-                    print(f'{exception_count}. {err}')
+    exception_count = check_runner.check_all(path, categories, get_errors,
+                                             rule_version, 'metadata_style_checker',
+                                             path_to_cache, shard,
+                                             path_to_results, jobs)
 
     # Throw once if there are exceptions.
     if exception_count > 0:
@@ -331,6 +307,18 @@ def main():
     parser = argparse.ArgumentParser(description=msg)
     parser.add_argument('-a', '--all', help='path to the samples repo root')
     parser.add_argument('-s', '--single', help='path to a single sample')
+    parser.add_argument('--cache', default=default_cache_path,
+                        help='path to the results cache used with --all')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='check every sample, without reading or '
+                             'writing the results cache')
+    parser.add_argument('--shard', type=check_runner.parse_shard, default=(1, 1),
+                        help='with --all, check only shard i of N, e.g. 2/4')
+    parser.add_argument('--results',
+                        help='with --all, also write the results as JSON, to '
+                             'combine shards with "check_runner.py merge"')
+    parser.add_argument('--jobs', type=int, default=1,
+                        help='with --all, number of processes checking samples')
     args = parser.parse_args()
 
     if args.single:
@@ -340,7 +328,8 @@ def main():
             raise err
     elif args.all:
         try:
-            all_samples(args.all)
+            all_samples(args.all, None if args.no_cache else args.cache,
+                        args.shard, args.results, args.jobs)
         except Exception as err:
             raise err
     else:
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+
+import unittest
+
+import markdown_style_checker
+
+# region Fixtures
+# Rule ID -> (markdown that breaks the rule, the line it is reported on,
+# markdown that passes every rule). Each fixture is a complete document.
+fixtures = {
+    'MD001': ('# Title\n\n### Section\n', 3,
+              '# Title\n\n## Section\n'),
+    'MD002': ('## Title\n', 1,
+              '# Title\n'),
+    'MD003': ('# Title\n\n## Section ##\n', 3,
+              '# Title\n\n## Section\n'),
+    'MD004': ('# Title\n\n- Item\n', 3,
+              '# Title\n\n* Item\n'),
+    'MD005': ('# Title\n\n* Item\n * Item\n', 4,
+              '# Title\n\n* Item\n* Item\n'),
+    'MD006': ('# Title\n\n  * Item\n', 3,
+              '# Title\n\n* Item\n'),
+    'MD009': ('# Title\n\nText \n', 3,
+              '# Title\n\nText  \nwith a line break.\n'),
+    'MD010': ('# Title\n\nText\twith a tab.\n', 3,
+              '# Title\n\nText with a space.\n'),
+    'MD011': ('# Title\n\n(Esri)[https://www.esri.com]\n', 3,
+              '# Title\n\n[Esri](https://www.esri.com)\n'),
+    'MD012': ('# Title\n\n\nText\n', 3,
+              '# Title\n\nText\n'),
+    'MD014': ('# Title\n\n```sh\n$ dotnet build\n```\n', 3,
+              '# Title\n\n```sh\ndotnet build\n```\n'),
+    'MD018': ('# Title\n\n##Section\n', 3,
+              '# Title\n\n## Section\n'),
+    'MD019': ('# Title\n\n##  Section\n', 3,
+              '# Title\n\n## Section\n'),
+    'MD020': ('# Title\n\n##Section ##\n', 3,
+              '# Title\n\n## Section\n'),
+    'MD021': ('# Title\n\n##  Section ##\n', 3,
+              '# Title\n\n## Section\n'),
+    'MD022': ('# Title\n\n## Section\nText\n', 3,
+              '# Title\n\n## Section\n\nText\n'),
+    'MD023': ('# Title\n\n  ## Section\n', 3,
+              '# Title\n\n## Section\n'),
+    'MD024': ('# Title\n\n## Section\n\n## Section\n', 5,
+              '# Title\n\n## Section\n\n## Other section\n'),
+    'MD025': ('# Title\n\n# Another title\n', 3,
+              '# Title\n\n## Section\n'),
+    'MD026': ('# Title\n\n## Section:\n', 3,
+              '# Title\n\n## Section\n'),
+    'MD027': ('# Title\n\n>  Quote\n', 3,
+              '# Title\n\n> Quote\n'),
+    'MD028': ('# Title\n\n> Quote\n\n> Quote\n', 4,
+              '# Title\n\n> Quote\n>\n> Quote\n'),
+    'MD029': ('# Title\n\n1. Item\n3. Item\n', 4,
+              '# Title\n\n1. Item\n2. Item\n'),
+    'MD030': ('# Title\n\n*  Item\n', 3,
+              '# Title\n\n* Item\n'),
+    'MD031': ('# Title\n\nText\n```sh\ndotnet build\n```\n', 4,
+              '# Title\n\nText\n\n```sh\ndotnet build\n```\n'),
+    'MD032': ('# Title\n\nText\n* Item\n', 4,
+              '# Title\n\nText\n\n* Item\n'),
+    'MD033': ('# Title\n\n<b>Text</b>\n', 3,
+              '# Title\n\nSome **bold** text\n'),
+    'MD034': ('# Title\n\nSee https://www.esri.com\n', 3,
+              '# Title\n\nSee <https://www.esri.com>\n'),
+    'MD035': ('# Title\n\n***\n\n---\n', 5,
+              '# Title\n\n***\n\n***\n'),
+    'MD036': ('# Title\n\n**Section**\n', 3,
+              '# Title\n\n## Section\n'),
+    'MD037': ('# Title\n\nSome ** bold ** text\n', 3,
+              '# Title\n\nSome **bold** text\n'),
+    'MD038': ('# Title\n\nRun ` dotnet build `\n', 3,
+              '# Title\n\nRun `dotnet build`\n'),
+    'MD039': ('# Title\n\n[ Esri ](https://www.esri.com)\n', 3,
+              '# Title\n\n[Esri](https://www.esri.com)\n'),
+    'MD040': ('# Title\n\n```\ndotnet build\n```\n', 3,
+              '# Title\n\n```sh\ndotnet build\n```\n'),
+    'MD041': ('Text\n\n# Title\n', 1,
+              '# Title\n\nText\n'),
+    'MD046': ('# Title\n\n    dotnet build\n', 3,
+              '# Title\n\n```sh\ndotnet build\n```\n'),
+    'MD047': ('# Title\n\nText', 3,
+              '# Title\n\nText\n')
+}
+# endregion
+
+
+class TestMarkdownStyleChecker(unittest.TestCase):
+
+    def test_every_rule_has_a_fixture(self):
+        self.assertEqual(set(markdown_style_checker.rules) - markdown_style_checker.excluded_rules, set(fixtures))
+
+    def test_violation_is_reported(self):
+        for rule_id, (contents, linenum, _) in fixtures.items():
+            with self.subTest(rule_id):
+                errors = markdown_style_checker.lint_contents(contents)
+                self.assertEqual([line for line, rule in errors if rule == rule_id], [linenum])
+
+    def test_clean_document_passes(self):
+        for rule_id, (_, _, contents) in fixtures.items():
+            with self.subTest(rule_id):
+                self.assertEqual(markdown_style_checker.lint_contents(contents), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,172 @@
+'''
+History of benchmark results (see run_benchmarks.py), stored as JSON lines keyed by git commit,
+and a comparison that flags slowdowns against the results of earlier commits.
+'''
+import os
+import sys
+import json
+import random
+import argparse
+import statistics
+import subprocess
+from itertools import combinations
+from math import comb
+from datetime import datetime, timezone
+
+script_location = os.path.dirname(os.path.realpath(__file__))
+
+default_history_path = os.path.join(script_location, ".benchmark_history.jsonl")
+
+def get_git_commit(path):
+    '''
+    Returns (commit hash, True if the working tree has uncommitted changes) for the repository containing path,
+    or ("unknown", False) if git isn't available
+    '''
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], cwd=path, capture_output=True, text=True, check=True).stdout.strip()
+        status = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=path, capture_output=True, text=True, check=True).stdout
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown", False
+    return commit, status.strip() != ""
+
+def get_revision(record):
+    '''
+    The key results are grouped by: the commit, marked "+dirty" for runs with uncommitted changes
+    '''
+    return record["commit"] + ("+dirty" if record.get("dirty") else "")
+
+def append_results(path_to_history, results):
+    '''
+    Appends one line per tool and tree size to the history, tagged with the current git commit
+    results: list returned by run_benchmarks.run_benchmarks
+    '''
+    commit, dirty = get_git_commit(script_location)
+    timestamp = datetime.now(timezone.utc).isoformat(timespec="seconds")
+    with open(path_to_history, 'a') as history_file:
+        for result in results:
+            record = {"commit": commit, "dirty": dirty, "timestamp": timestamp}
+            record.update(result)
+            history_file.write(json.dumps(record, sort_keys=True) + "\n")
+
+def load_history(path_to_history):
+    '''
+    Returns the history records in the order they were written; lines that can't be read are skipped
+    '''
+    records = []
+    try:
+        with open(path_to_history, 'r') as history_file:
+            for line in history_file:
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    continue
+    except OSError:
+        pass
+    return records
+
+def permutation_p_value(current_runs, baseline_runs, iterations=10000, seed=0):
+    '''
+    One-sided permutation test: the probability that the current runs are this much slower on average
+    if they came from the same distribution as the baseline runs.
+    Exact for small samples; sampled with a fixed seed otherwise.
+    '''
+    observed = statistics.mean(current_runs) - statistics.mean(baseline_runs)
+    pooled = list(current_runs) + list(baseline_runs)
+    count = len(current_runs)
+    total = sum(pooled)
+
+    def difference(current_sum):
+        return current_sum / count - (total - current_sum) / (len(pooled) - count)
+
+    at_least_as_slow = 0
+    if comb(len(pooled), count) <= iterations:
+        permutations = 0
+        for chosen in combinations(pooled, count):
+            permutations += 1
+            if difference(sum(chosen)) >= observed - 1e-12:
+                at_least_as_slow += 1
+        return at_least_as_slow / permutations
+
+    generator = random.Random(seed)
+    for i in range(iterations):
+        if difference(sum(generator.sample(pooled, count))) >= observed - 1e-12:
+            at_least_as_slow += 1
+    return (at_least_as_slow + 1) / (iterations + 1)
+
+def compare(records, commit=None, baselines=5, threshold=0.05, alpha=0.05):
+    '''
+    Compares the results of a commit (the most recent one by default) with those of the previous baselines commits, in history order.
+    Results from a working tree with uncommitted changes are kept apart from the results of the commit itself (see get_revision).
+    A tool and tree size is flagged as slower when its median is more than threshold (a fraction) above the baseline median
+    and the permutation test gives a p-value at or below alpha.
+    Returns a list of {"tool", "samples", "current", "baseline", "change", "p_value", "slower"}.
+    '''
+    commits = list(dict.fromkeys(get_revision(record) for record in records))
+    if not commits:
+        return []
+    if commit is None:
+        commit = commits[-1]
+    else:
+        matches = [known for known in commits if known.startswith(commit)]
+        if not matches:
+            raise ValueError(f"No results for commit {commit}")
+        commit = matches[-1]
+    baseline_commits = commits[:commits.index(commit)][-baselines:]
+
+    comparisons = []
+    current_records = [record for record in records if get_revision(record) == commit]
+    keys = list(dict.fromkeys((record["tool"], record["samples"]) for record in current_records))
+    for tool, samples in keys:
+        current_runs = [run for record in current_records if (record["tool"], record["samples"]) == (tool, samples) for run in record["runs"]]
+        baseline_runs = [run for record in records
+                         if get_revision(record) in baseline_commits and (record["tool"], record["samples"]) == (tool, samples)
+                         for run in record["runs"]]
+        if not current_runs or not baseline_runs:
+            continue
+        current = statistics.median(current_runs)
+        baseline = statistics.median(baseline_runs)
+        change = (current - baseline) / baseline if baseline > 0 else 0
+        p_value = permutation_p_value(current_runs, baseline_runs)
+        comparisons.append({"tool": tool, "samples": samples, "current": current, "baseline": baseline, "change": change,
+                            "p_value": p_value, "slower": change > threshold and p_value <= alpha})
+    return comparisons
+
+def print_comparisons(comparisons):
+    for comparison in comparisons:
+        flag = "SLOWER" if comparison["slower"] else ""
+        print(f"{comparison['tool']:<26} {comparison['samples']:>6} samples  {comparison['baseline']:8.3f}s -> {comparison['current']:8.3f}s  "
+              f"{comparison['change']:+7.1%}  p={comparison['p_value']:.3f}  {flag}")
+
+def main():
+    '''
+    Usage: python benchmark_history.py compare [--history {path}] [--commit {rev}] [--baselines {N}] [--threshold {fraction}] [--alpha {p}]
+        Compares the benchmark results of a commit (the most recent in the history by default) with the previous N commits.
+        Exits with an error code if any tool got significantly slower.
+    Results are added to the history by run_benchmarks.py --history.
+    '''
+    parser = argparse.ArgumentParser(description="Compares benchmark results with earlier commits.")
+    parser.add_argument("command", choices=["compare"], help="compare the results of a commit with earlier commits")
+    parser.add_argument("--history", default=default_history_path, help="path to the benchmark history (JSON lines)")
+    parser.add_argument("--commit", help="commit to compare (prefix of the hash); defaults to the most recent results")
+    parser.add_argument("--baselines", type=int, default=5, help="number of earlier commits to compare with")
+    parser.add_argument("--threshold", type=float, default=0.05, help="smallest slowdown to flag, as a fraction of the baseline time")
+    parser.add_argument("--alpha", type=float, default=0.05, help="significance level of the permutation test")
+    args = parser.parse_args()
+
+    records = load_history(args.history)
+    try:
+        comparisons = compare(records, args.commit, args.baselines, args.threshold, args.alpha)
+    except ValueError as e:
+        print(e)
+        sys.exit(1)
+    if not comparisons:
+        print(f"Nothing to compare; {args.history} needs results for at least two commits.")
+        return
+    print_comparisons(comparisons)
+    slower = [comparison for comparison in comparisons if comparison["slower"]]
+    if slower:
+        print(f"{len(slower)} significant slowdown(s)")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
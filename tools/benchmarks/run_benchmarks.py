@@ -0,0 +1,181 @@
+'''
+Times the sample tools on synthetic samples trees (see synthetic_tree.py), end to end and per phase.
+Each run happens in a fresh Python process, so caches from one run (parsed readmes, directory indexes) never speed up the next.
+Phases come from the spans the tools record with metadata_tools/trace_events.py.
+'''
+import os
+import sys
+import io
+import json
+import time
+import shutil
+import argparse
+import statistics
+import subprocess
+import tempfile
+from contextlib import redirect_stdout
+
+script_location = os.path.dirname(os.path.realpath(__file__))
+tools_location = os.path.join(script_location, "..")
+sys.path.append(os.path.join(tools_location, "metadata_tools"))
+sys.path.append(os.path.join(tools_location, "readme_copy"))
+sys.path.append(os.path.join(tools_location, "CI", "README_Metadata_StyleCheck"))
+import trace_events
+from synthetic_tree import generate_tree
+from benchmark_history import append_results, default_history_path
+
+# region Tools
+
+def run_process_metadata(sample_root, work_dir):
+    import process_metadata
+    process_metadata.process_all_samples(sample_root)
+
+def run_readme_copy(sample_root, work_dir):
+    import readme_copy
+    readme_copy.copy_readmes(readme_copy.get_wpf_samples(sample_root), sample_root)
+
+def run_all_designs(sample_root, work_dir):
+    import README_style_checker
+    try:
+        README_style_checker.all_designs(sample_root)
+    except Exception:
+        # style errors are reported, not a reason to stop timing
+        pass
+
+def run_all_samples(sample_root, work_dir):
+    import metadata_style_checker
+    try:
+        metadata_style_checker.all_samples(sample_root)
+    except Exception:
+        pass
+
+def run_emit_standalone_solution(sample_root, work_dir):
+    import generate_sample_solutions
+    output_root = os.path.join(work_dir, "solutions")
+    if os.path.exists(output_root):
+        shutil.rmtree(output_root)
+    os.makedirs(os.path.join(output_root, "WPF"))
+    for sample_dir in generate_sample_solutions.find_sample_dirs("WPF", sample_root):
+        generate_sample_solutions.export_sample("WPF", sample_dir, output_root)
+
+# Benchmarked tools, in the order they run
+tools = {
+    "process_metadata": run_process_metadata,
+    "readme_copy": run_readme_copy,
+    "all_designs": run_all_designs,
+    "all_samples": run_all_samples,
+    "emit_standalone_solution": run_emit_standalone_solution,
+}
+
+# endregion
+
+def time_tool(tool, sample_root, work_dir):
+    '''
+    Runs one tool with tracing on and its output discarded.
+    Returns {"seconds": end to end time, "phases": {span name: total seconds}}
+    '''
+    trace_events.start_tracing()
+    start = time.perf_counter()
+    with redirect_stdout(io.StringIO()):
+        tools[tool](sample_root, work_dir)
+    seconds = time.perf_counter() - start
+
+    phases = {}
+    for event in trace_events.events:
+        phases[event["name"]] = phases.get(event["name"], 0) + event["dur"] / 1e6
+    return {"seconds": seconds, "phases": phases}
+
+def run_in_new_process(tool, sample_root, work_dir):
+    '''
+    Times a tool in a fresh interpreter (see time_tool); returns its result
+    '''
+    command = [sys.executable, os.path.realpath(__file__), "--run-tool", tool, "--tree", sample_root, "--work-dir", work_dir]
+    output = subprocess.run(command, capture_output=True, text=True, check=True).stdout
+    return json.loads(output.splitlines()[-1])
+
+def get_tree(work_dir, sample_count, seed):
+    '''
+    Returns the path to the src folder of the synthetic tree for sample_count, generating it if it isn't in work_dir yet
+    '''
+    tree_root = os.path.join(work_dir, f"tree_{sample_count}_{seed}")
+    sample_root = os.path.join(tree_root, "src")
+    marker = os.path.join(tree_root, "complete")
+    if not os.path.exists(marker):
+        if os.path.exists(tree_root):
+            shutil.rmtree(tree_root)
+        start = time.perf_counter()
+        generate_tree(tree_root, sample_count, seed)
+        with open(marker, 'w+') as marker_file:
+            marker_file.write("")
+        print(f"Generated {sample_count} samples per platform in {time.perf_counter() - start:.1f}s")
+    return sample_root
+
+def run_benchmarks(sample_counts, tool_names, repeat, warmup, work_dir, seed=0):
+    '''
+    Times every tool on a tree of each size.
+    Returns a list of {"tool", "samples", "runs": [seconds, ...], "median", "phases": {span name: median seconds}}
+    '''
+    results = []
+    for sample_count in sample_counts:
+        sample_root = get_tree(work_dir, sample_count, seed)
+        for tool in tool_names:
+            # warm-up runs bring the generated files up to date, like a tree that was synced before
+            for i in range(warmup):
+                run_in_new_process(tool, sample_root, work_dir)
+            runs = [run_in_new_process(tool, sample_root, work_dir) for i in range(repeat)]
+            phase_names = sorted(set(name for run in runs for name in run["phases"]))
+            results.append({
+                "tool": tool,
+                "samples": sample_count,
+                "runs": [run["seconds"] for run in runs],
+                "median": statistics.median(run["seconds"] for run in runs),
+                "phases": {name: statistics.median(run["phases"].get(name, 0) for run in runs) for name in phase_names},
+            })
+            print_result(results[-1])
+    return results
+
+def print_result(result):
+    print(f"{result['tool']:<26} {result['samples']:>6} samples  {result['median']:8.3f}s  (runs: {', '.join(f'{run:.3f}' for run in result['runs'])})")
+    for name, seconds in sorted(result["phases"].items(), key=lambda phase: -phase[1]):
+        print(f"    {name:<22} {seconds:8.3f}s")
+
+def main():
+    '''
+    Usage: python run_benchmarks.py [--samples {N} ...] [--tools {name} ...] [--repeat {N}] [--warmup {N}] [--work-dir {path}] [--output {path}] [--history [{path}]]
+        Generates a synthetic tree for each sample count (samples per platform) and times each tool on it.
+        Trees are kept in the work folder and reused by later runs; by default a temporary folder is used and removed.
+        With --history, the results are added to the benchmark history for the current git commit (see benchmark_history.py).
+    '''
+    parser = argparse.ArgumentParser(description="Times the sample tools on synthetic samples trees.")
+    parser.add_argument("--samples", type=int, nargs="+", default=[100, 1000], help="samples per platform, e.g. 100 1000 20000")
+    parser.add_argument("--tools", nargs="+", choices=list(tools.keys()), default=list(tools.keys()), help="tools to time")
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per tool and size")
+    parser.add_argument("--warmup", type=int, default=1, help="untimed runs before the timed ones")
+    parser.add_argument("--seed", type=int, default=0, help="seed for the synthetic trees")
+    parser.add_argument("--work-dir", help="folder for the synthetic trees and outputs; kept after the run")
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--history", nargs="?", const=default_history_path, help="add the results to this benchmark history (JSON lines); defaults to .benchmark_history.jsonl next to the script")
+    # used internally to time a single run in a fresh process
+    parser.add_argument("--run-tool", choices=list(tools.keys()), help=argparse.SUPPRESS)
+    parser.add_argument("--tree", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_tool:
+        print(json.dumps(time_tool(args.run_tool, args.tree, args.work_dir)))
+        return
+
+    work_dir = args.work_dir if args.work_dir else tempfile.mkdtemp(prefix="sample_tools_benchmark_")
+    try:
+        results = run_benchmarks(args.samples, args.tools, args.repeat, args.warmup, work_dir, args.seed)
+    finally:
+        if not args.work_dir:
+            shutil.rmtree(work_dir)
+    if args.output:
+        with open(args.output, 'w+') as output_file:
+            json.dump(results, output_file, indent=4)
+    if args.history:
+        append_results(args.history, results)
+        print(f"Added the results to {args.history}")
+
+if __name__ == "__main__":
+    main()
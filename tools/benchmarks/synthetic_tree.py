@@ -0,0 +1,162 @@
+'''
+Generates a synthetic samples tree (src/{platform}/.../Samples/{category}/{sample}) for benchmarking the sample tools.
+Samples are laid out the way samplegen.py lays out a new sample, from the same templates (sample_generator/templates/default),
+with a complete readme and matching metadata so the tools do the same work they do on the real samples.
+'''
+import os
+import sys
+import json
+import random
+import argparse
+from datetime import datetime
+
+script_location = os.path.dirname(os.path.realpath(__file__))
+sys.path.append(os.path.join(script_location, "..", "metadata_tools"))
+sys.path.append(os.path.join(script_location, "..", "readme_copy"))
+from sample_index import get_platform_samples_root
+from file_utils import copy_file, copy_strategies
+from readme_copy import convert_readme
+
+template_root = os.path.join(script_location, "..", "sample_generator", "templates", "default")
+
+# Platforms with a template in sample_generator/templates/default
+platforms = ["UWP", "WPF", "Android", "Forms", "iOS", "WinUI"]
+
+# Categories whose folder name is the same as the category, as samplegen creates them
+categories = ["Analysis", "Data", "Geometry", "Geoprocessing", "Hydrography", "Layers", "Location", "Map", "Scene", "Search", "Security", "Symbology"]
+
+verbs = ["Display", "Add", "Query", "Edit", "Identify", "Find", "Create", "Show", "Change", "Generate", "Buffer", "Sketch"]
+nouns = ["map", "layer", "feature", "graphic", "route", "scene", "raster", "symbol", "extent", "geometry", "table", "service"]
+apis = ["Basemap", "FeatureLayer", "FeatureTable", "Geometry", "GeometryEngine", "Graphic", "GraphicsOverlay", "Map", "MapView",
+        "QueryParameters", "RouteTask", "Scene", "SceneView", "ServiceFeatureTable", "SimpleMarkerSymbol", "Viewpoint"]
+words = ["the", "map", "layer", "shows", "features", "with", "a", "service", "select", "and", "view", "results", "data", "from",
+         "query", "each", "point", "area", "tap", "click", "on", "to", "display", "table", "attribute", "extent", "zoom", "route"]
+
+# sample_generator/templates/default file -> file name in the sample folder, per platform (see samplegen.orchestrate_file_copy)
+def get_template_files(platform, sample_name):
+    if platform in ["Android", "iOS"]:
+        return [(platform + ".cs", sample_name + ".cs")]
+    return [(platform + ".xaml.cs", sample_name + ".xaml.cs"), (platform + ".xaml", sample_name + ".xaml")]
+
+def read_templates():
+    '''
+    Reads the default sample templates once: template file name -> text
+    '''
+    templates = {}
+    for file_name in os.listdir(template_root):
+        if not file_name.endswith(".jpg"):
+            with open(os.path.join(template_root, file_name), 'r') as template_file:
+                templates[file_name] = template_file.read()
+    return templates
+
+def make_sentence(generator, word_count):
+    sentence = " ".join(generator.choice(words) for i in range(word_count))
+    return sentence[0].upper() + sentence[1:] + "."
+
+def make_sample(generator, number):
+    '''
+    Returns the made-up content of one sample: names, category, readme sections, APIs and tags
+    '''
+    verb, noun = generator.choice(verbs), generator.choice(nouns)
+    sample = {
+        "sample_name": f"{verb}{noun.title()}{number}",
+        "friendly_name": f"{verb} {noun} {number}",
+        "category": categories[number % len(categories)],
+        "description": make_sentence(generator, 14),
+        "use_case": " ".join(make_sentence(generator, 12) for i in range(3)),
+        "how_to_use": make_sentence(generator, 10),
+        "how_it_works": [make_sentence(generator, 8) for i in range(generator.randint(3, 6))],
+        "apis": sorted(generator.sample(apis, generator.randint(3, 6))),
+        "tags": sorted(set([noun] + generator.sample(words[1:], 4))),
+    }
+    return sample
+
+def get_readme(sample):
+    '''
+    The sample's readme, in the format the readme style checker expects
+    '''
+    sections = [
+        f"# {sample['friendly_name'][0].upper() + sample['friendly_name'][1:]}",
+        sample["description"],
+        f"![Image of {sample['friendly_name'].lower()}]({sample['sample_name']}.jpg)",
+        "## Use case",
+        sample["use_case"],
+        "## How to use the sample",
+        sample["how_to_use"],
+        "## How it works",
+        "\n".join(f"{i + 1}. {step}" for i, step in enumerate(sample["how_it_works"])),
+        "## Relevant API",
+        "\n".join(f"* {api}" for api in sample["apis"]),
+        "## Tags",
+        ", ".join(sample["tags"]),
+    ]
+    return "\n\n".join(sections) + "\n"
+
+def get_metadata(sample, platform, template):
+    '''
+    The sample's readme.metadata.json: the template's fields, filled in the way process_metadata writes them
+    '''
+    data = json.loads(template)
+    data.update({
+        "category": sample["category"],
+        "description": sample["description"] if platform == "WPF" else convert_readme(sample["description"], platform),
+        "formal_name": sample["sample_name"],
+        "images": [sample["sample_name"] + ".jpg"],
+        "keywords": sample["tags"],
+        "offline_data": [],
+        "redirect_from": [f"/net/latest/{platform.lower()}/sample-code/{sample['sample_name'].lower()}.htm"],
+        "relevant_apis": sample["apis"],
+        "snippets": sorted(destination for source, destination in get_template_files(platform, sample["sample_name"])),
+        "title": sample["friendly_name"][0].upper() + sample["friendly_name"][1:],
+    })
+    return json.dumps(data, indent=4, sort_keys=True)
+
+def write_text(path, contents):
+    with open(path, 'w') as output_file:
+        output_file.write(contents)
+
+def generate_tree(output_root, sample_count, seed=0, copy_strategy="hardlink"):
+    '''
+    Writes a tree of sample_count samples per platform to {output_root}/src and returns the path to src.
+    The same seed always produces the same tree.
+    copy_strategy: how screenshots are copied from the template; hard links keep large trees small
+    '''
+    sample_root = os.path.join(output_root, "src")
+    templates = read_templates()
+    generator = random.Random(seed)
+    replacements_common = {"sample_year": str(datetime.today().year), "Geo_View": "MapView", "[offline_data_attr]": ""}
+    for number in range(sample_count):
+        sample = make_sample(generator, number)
+        replacements = dict(replacements_common)
+        replacements.update({"sample_name": sample["sample_name"], "friendly_name": sample["friendly_name"],
+                             "sample_category": sample["category"], "sample_description": sample["description"]})
+        readme = get_readme(sample)
+        for platform in platforms:
+            sample_dir = os.path.join(get_platform_samples_root(platform, sample_root), sample["category"], sample["sample_name"])
+            os.makedirs(sample_dir, exist_ok=True)
+            for source, destination in get_template_files(platform, sample["sample_name"]):
+                contents = templates[source]
+                for entry in replacements.keys():
+                    contents = contents.replace(entry, replacements[entry])
+                write_text(os.path.join(sample_dir, destination), contents)
+            copy_file(os.path.join(template_root, "sample_name.jpg"), os.path.join(sample_dir, sample["sample_name"] + ".jpg"), copy_strategy)
+            write_text(os.path.join(sample_dir, "readme.md"), readme if platform == "WPF" else convert_readme(readme, platform))
+            write_text(os.path.join(sample_dir, "readme.metadata.json"), get_metadata(sample, platform, templates["readme.metadata.json"]))
+    return sample_root
+
+def main():
+    '''
+    Usage: python synthetic_tree.py {output folder} {number of samples per platform} [--seed {N}] [--copy-strategy copy|hardlink|reflink]
+    '''
+    parser = argparse.ArgumentParser(description="Generates a synthetic samples tree for benchmarking the sample tools.")
+    parser.add_argument("output_root", help="folder to create the src folder in")
+    parser.add_argument("sample_count", type=int, help="number of samples per platform, e.g. 100 to 20000")
+    parser.add_argument("--seed", type=int, default=0, help="seed for the generated names and text")
+    parser.add_argument("--copy-strategy", choices=copy_strategies, default="hardlink", help="how screenshots are copied from the template")
+    args = parser.parse_args()
+
+    sample_root = generate_tree(args.output_root, args.sample_count, args.seed, args.copy_strategy)
+    print(f"Generated {args.sample_count} samples per platform in {sample_root}")
+
+if __name__ == "__main__":
+    main()
@@ -1,39 +1,222 @@
-def safe_read_contents(path_to_file):
+import os
+import shutil
+import codecs
+import locale
+import tempfile
+try:
+    import fcntl
+except ImportError:
+    # not available on Windows; reflinks fall back to plain copies
+    fcntl = None
+
+# ioctl request number for cloning a file on Linux (btrfs, xfs, ...)
+FICLONE = 0x40049409
+
+copy_strategies = ["copy", "hardlink", "reflink"]
+
+# Encoding and byte order mark of every file read with safe_read_contents, keyed by absolute path
+file_encodings = {}
+
+utf16_byte_order_marks = [(codecs.BOM_UTF16_LE, "utf-16-le"), (codecs.BOM_UTF16_BE, "utf-16-be")]
+
+# Results of write_if_changed
+write_results = ["written", "unchanged", "skipped"]
+
+# Writes held back by defer_writes, keyed by absolute path: (path, text, bytes, bytes on disk or None). None when files are written directly.
+deferred_writes = None
+
+# umask of this process; files created by write_if_changed get the same permissions as files created by open()
+process_umask = os.umask(0)
+os.umask(process_umask)
+
+def detect_encoding(raw_bytes):
     '''
-    Reads a file, returns contents as text.
-    Handles annoying unicode situations.
+    Chooses the codec for a file's bytes: a UTF-16 byte order mark, then strict UTF-8, then the platform default, then UTF-16.
+    Each candidate is tried at most once. A UTF-8 byte order mark is kept in the text (as \ufeff), so it is written back as is.
+    Returns (encoding, byte order mark, text), or None if no codec fits.
     '''
-    original_contents = ""
+    for bom, encoding in utf16_byte_order_marks:
+        if raw_bytes.startswith(bom):
+            try:
+                return encoding, bom, raw_bytes[len(bom):].decode(encoding)
+            except UnicodeDecodeError:
+                break
     try:
-        with open(path_to_file, "r") as handle:
-            original_contents = handle.read()
+        return "utf-8", b"", raw_bytes.decode("utf-8")
     except UnicodeDecodeError:
+        pass
+    default_encoding = locale.getpreferredencoding(False)
+    if codecs.lookup(default_encoding).name != "utf-8":
         try:
-            with open(path_to_file, "r", encoding='utf-8') as handle:
-                original_contents = handle.read()
+            return default_encoding, b"", raw_bytes.decode(default_encoding)
         except UnicodeDecodeError:
-            try:
-                with open(path_to_file, "r", encoding='utf-16') as handle:
-                    original_contents = handle.read()
-            except:
-                print("Error reading file: "+path_to_file)
+            pass
+    # last resort, as before encodings were detected: UTF-16 without a byte order mark.
+    # The utf-16 codec adds a byte order mark when the file is written back.
+    try:
+        return "utf-16", b"", raw_bytes.decode("utf-16")
+    except UnicodeDecodeError:
+        return None
 
-    return original_contents
+def safe_read_contents(path_to_file):
+    '''
+    Reads a file, returns contents as text.
+    Handles annoying unicode situations: the file is read once and its encoding detected (see detect_encoding).
+    The encoding is remembered, so safe_write_contents and write_if_changed write the file back the same way.
+    '''
+    with open(path_to_file, "rb") as handle:
+        raw_bytes = handle.read()
+    detected = detect_encoding(raw_bytes)
+    if detected is None:
+        print("Error reading file: "+path_to_file)
+        return ""
+    encoding, bom, text = detected
+    file_encodings[os.path.abspath(path_to_file)] = (encoding, bom)
+    # same line endings as reading the file in text mode
+    return text.replace("\r\n", "\n").replace("\r", "\n")
 
-def safe_write_contents(path_to_file, new_content):
+def safe_write_contents(path_to_file, new_content, like_file=None):
     '''
-    Writes a string to a file, regardless of encoding
+    Writes a string to a file, regardless of encoding.
+    A file read with safe_read_contents is written in the encoding, and with the byte order mark, it was read with.
+    like_file: write with the encoding of another file that was read, e.g. when writing a modified copy of it
     '''
     try:
-        with open(path_to_file, 'w+') as rewrite_handle:
-            rewrite_handle.write(new_content)
+        new_bytes = encode_text(new_content, like_file or path_to_file)
     except UnicodeEncodeError:
+        print("Error writing file: "+path_to_file)
+        return
+    with open(path_to_file, 'wb') as rewrite_handle:
+        rewrite_handle.write(new_bytes)
+
+def copy_file(source, destination, strategy="copy"):
+    '''
+    Copies a file using one of the copy_strategies:
+    copy - byte-for-byte copy, preserving modification time
+    hardlink - hard link to the source; the two paths share storage, so the copy must never be edited in place
+    reflink - copy-on-write clone, on file systems that support it
+    Falls back to a plain copy if the strategy isn't possible (e.g. different drives, unsupported file system).
+    '''
+    if os.path.lexists(destination):
+        os.remove(destination)
+    if strategy == "hardlink":
+        try:
+            os.link(source, destination)
+            return
+        except OSError:
+            pass
+    elif strategy == "reflink" and fcntl is not None:
         try:
-            with open(path_to_file, 'w+', encoding="utf-8") as rewrite_handle:
-                rewrite_handle.write(new_content)
+            with open(source, 'rb') as source_handle, open(destination, 'wb') as destination_handle:
+                fcntl.ioctl(destination_handle.fileno(), FICLONE, source_handle.fileno())
+            shutil.copystat(source, destination)
+            return
+        except OSError:
+            if os.path.exists(destination):
+                os.remove(destination)
+    shutil.copy2(source, destination)
+
+def encode_text(content, path_to_file=None):
+    '''
+    Returns the bytes that writing content to a file opened in text mode would produce (platform line endings).
+    Uses the encoding path_to_file was read with, if it was read with safe_read_contents;
+    otherwise the platform default, falling back to utf-8 and then utf-16.
+    '''
+    if os.linesep != "\n":
+        content = content.replace("\n", os.linesep)
+    if path_to_file is not None and os.path.abspath(path_to_file) in file_encodings:
+        encoding, bom = file_encodings[os.path.abspath(path_to_file)]
+        try:
+            return bom + content.encode(encoding)
         except UnicodeEncodeError:
-            try:
-                with open(path_to_file, 'w+', encoding="utf-16") as rewrite_handle:
-                    rewrite_handle.write(new_content)
-            except:
-                print("Error writing file: "+path_to_file)
\ No newline at end of file
+            pass
+    for encoding in [locale.getpreferredencoding(False), "utf-8"]:
+        try:
+            return content.encode(encoding)
+        except UnicodeEncodeError:
+            pass
+    return content.encode("utf-16")
+
+def write_if_changed(path_to_file, new_content, create=True):
+    '''
+    Writes text to a file only if it differs from what is already on disk, so unchanged files keep their modification time.
+    The write is atomic: the content goes to a temporary file in the same folder, which then replaces the target.
+    create: when False, a file that doesn't exist yet is skipped instead of created
+    Returns one of write_results: "written", "unchanged" or "skipped"
+    While writes are deferred (see defer_writes), the file is only written by flush_deferred_writes; the result is what the flush will do.
+    '''
+    new_bytes = encode_text(new_content, path_to_file)
+    key = os.path.abspath(path_to_file)
+    if deferred_writes is not None and key in deferred_writes:
+        # written earlier in this pipeline; compare with the file as it is on disk
+        existing_bytes = deferred_writes[key][3]
+    elif os.path.exists(path_to_file):
+        with open(path_to_file, 'rb') as existing_file:
+            existing_bytes = existing_file.read()
+    else:
+        existing_bytes = None
+    if existing_bytes is None and not create:
+        return "skipped"
+
+    if deferred_writes is not None:
+        deferred_writes[key] = (path_to_file, new_content, new_bytes, existing_bytes)
+    elif new_bytes != existing_bytes:
+        replace_file_bytes(path_to_file, new_bytes, existing_bytes is not None)
+    return "unchanged" if new_bytes == existing_bytes else "written"
+
+def replace_file_bytes(path_to_file, new_bytes, exists):
+    '''
+    Atomically replaces a file's content, keeping its permissions (or giving a new file the default permissions)
+    '''
+    folder, file_name = os.path.split(os.path.abspath(path_to_file))
+    handle, temp_path = tempfile.mkstemp(prefix=f".{file_name}.", suffix=".tmp", dir=folder)
+    try:
+        with os.fdopen(handle, 'wb') as temp_file:
+            temp_file.write(new_bytes)
+        if exists:
+            shutil.copymode(path_to_file, temp_path)
+        else:
+            os.chmod(temp_path, 0o666 & ~process_umask)
+        os.replace(temp_path, path_to_file)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+def defer_writes():
+    '''
+    Holds back the writes of write_if_changed until flush_deferred_writes, so that a pipeline of tools
+    (e.g. sample_sync) can pass generated files from one stage to the next in memory and write them all at the end.
+    '''
+    global deferred_writes
+    if deferred_writes is None:
+        deferred_writes = {}
+
+def get_deferred_contents():
+    '''
+    Returns {path: text} for the files written while writes are deferred, including unchanged ones, in the order they were first written
+    '''
+    if deferred_writes is None:
+        return {}
+    return {path_to_file: new_content for path_to_file, new_content, new_bytes, existing_bytes in deferred_writes.values()}
+
+def flush_deferred_writes():
+    '''
+    Writes the held back files whose content changed, and stops deferring writes.
+    Returns the number of files written.
+    '''
+    global deferred_writes
+    pending = deferred_writes if deferred_writes is not None else {}
+    deferred_writes = None
+    written_count = 0
+    for path_to_file, new_content, new_bytes, existing_bytes in pending.values():
+        if new_bytes != existing_bytes:
+            replace_file_bytes(path_to_file, new_bytes, existing_bytes is not None)
+            written_count += 1
+    return written_count
+
+def summarize_writes(results):
+    '''
+    Formats a list of write_if_changed results as counts, e.g. "3 written, 1200 unchanged, 0 skipped"
+    '''
+    return ", ".join(f"{results.count(result)} {result}" for result in write_results)
@@ -0,0 +1,160 @@
+from sample_metadata import *
+from sample_index import get_index, get_platform_samples_root
+from process_metadata import write_build_script, get_build_script
+from concurrent.futures import ProcessPoolExecutor
+import trace_events
+import argparse
+import zipfile
+import os
+
+# Platforms with a template in templates/solutions
+solution_platforms = ["Android", "iOS", "UWP", "WPF", "XFA", "XFI", "XFU"]
+
+# Templates already read by this process, keyed by platform
+loaded_templates = {}
+
+def get_template(platform):
+    '''
+    Returns the solution template for the platform, reading it from disk on first use
+    '''
+    if platform not in loaded_templates:
+        loaded_templates[platform] = solution_template(platform)
+    return loaded_templates[platform]
+
+def find_sample_dirs(platform, sample_root):
+    '''
+    Returns the paths of all sample folders with metadata for a platform, in a stable order
+    '''
+    index = get_index(sample_root)
+    sample_dirs = []
+    for r, d, f in index.walk(get_platform_samples_root(platform, sample_root)):
+        d.sort()
+        for sample_dir in d:
+            if index.exists(os.path.join(r, sample_dir, "readme.metadata.json")):
+                sample_dirs.append(os.path.join(r, sample_dir))
+    return sample_dirs
+
+def export_sample(platform, sample_dir, output_root, zip_mode=None, copy_strategy="copy"):
+    '''
+    Emits the standalone solution for one sample; runs in a worker process.
+    zip_mode: None to write a folder, or "sample" to write {output_root}/{platform}/{formal_name}.zip
+    copy_strategy: how unchanged files are copied when writing a folder; one of file_utils.copy_strategies
+    Returns the sample's formal name, or None if the sample couldn't be exported.
+    '''
+    try:
+        sample = sample_metadata()
+        sample.populate_from_json(os.path.join(sample_dir, "readme.metadata.json"))
+        if zip_mode == "sample":
+            archive_path = os.path.join(output_root, platform, f"{sample.formal_name}.zip")
+            with zipfile.ZipFile(archive_path, "w", zipfile.ZIP_DEFLATED) as archive:
+                sample.emit_standalone_solution(platform, sample_dir, output_root, get_template(platform), archive)
+        else:
+            sample.emit_standalone_solution(platform, sample_dir, output_root, get_template(platform), copy_strategy=copy_strategy)
+        return sample.formal_name
+    except Exception as e:
+        print(f"Error exporting sample: {sample_dir} ({platform}) - {e}")
+        return None
+
+def export_platform_archive(platform, sample_dirs, output_root):
+    '''
+    Streams every sample of a platform, plus the build script, into {output_root}/{platform}.zip.
+    One archive can only be written by one process, so this is the unit of work for --zip platform.
+    Returns the list of exported sample names, in order (None for samples that couldn't be exported).
+    '''
+    exported = []
+    with zipfile.ZipFile(os.path.join(output_root, f"{platform}.zip"), "w", zipfile.ZIP_DEFLATED) as archive:
+        for sample_dir in sample_dirs:
+            try:
+                sample = sample_metadata()
+                sample.populate_from_json(os.path.join(sample_dir, "readme.metadata.json"))
+                sample.emit_standalone_solution(platform, sample_dir, output_root, get_template(platform), archive)
+                exported.append(sample.formal_name)
+            except Exception as e:
+                print(f"Error exporting sample: {sample_dir} ({platform}) - {e}")
+                exported.append(None)
+        # same bytes as write_build_script produces for the folder output
+        archive.writestr("BuildAll_CSharp.bat", encode_text(get_build_script([name for name in exported if name is not None], platform)))
+    return exported
+
+def main():
+    '''
+    Usage: python generate_sample_solutions.py {platform} {path_to_samples (ends in src)} {output_root} [--jobs {N}] [--zip sample|platform] [--copy-strategy copy|hardlink|reflink] [--trace {path}]
+        platform is one of Android, iOS, UWP, WPF, XFA, XFI, XFU, or all to export every platform in one run.
+        With --zip sample, each solution is written to its own .zip; with --zip platform, to one .zip per platform.
+        With --copy-strategy hardlink or reflink, files that need no replacements (images, most code files) are linked
+        or cloned from the samples instead of copied; this falls back to a copy where the file system doesn't support it.
+        With --trace, the time spent per sample and phase (template copy, rewrite) is written to a Chrome trace file (see trace_events).
+    '''
+    parser = argparse.ArgumentParser(description="Produces standalone Visual Studio solutions for each sample.")
+    parser.add_argument("platform", choices=solution_platforms + ["all"], help="platform to export, or all")
+    parser.add_argument("sample_root", help="path to samples (ends in src)")
+    parser.add_argument("output_root", help="output folder; a folder (or archive) is created in it for each platform")
+    parser.add_argument("--jobs", type=int, default=1, help="number of worker processes used to export samples")
+    parser.add_argument("--zip", choices=["sample", "platform"], help="write solutions to zip archives instead of folders")
+    parser.add_argument("--copy-strategy", choices=copy_strategies, default="copy", help="how unchanged files are copied into solution folders")
+    parser.add_argument("--trace", help="write a Chrome trace of where the time goes to this file")
+    args = parser.parse_args()
+    if args.trace:
+        trace_events.start_tracing()
+
+    platforms = solution_platforms if args.platform == "all" else [args.platform]
+
+    # read the templates up front; forked workers inherit them, other workers read each template once
+    for platform in platforms:
+        get_template(platform)
+
+    work_items = []
+    for platform in platforms:
+        for sample_dir in find_sample_dirs(platform, args.sample_root):
+            work_items.append((platform, sample_dir))
+
+    if args.zip == "platform":
+        # one worker per platform archive
+        os.makedirs(args.output_root, exist_ok=True)
+        sample_dirs_args = [[sample_dir for item_platform, sample_dir in work_items if item_platform == platform] for platform in platforms]
+        output_root_args = [args.output_root] * len(platforms)
+        if args.jobs > 1 and len(platforms) > 1:
+            with ProcessPoolExecutor(max_workers=args.jobs) as executor:
+                # worker spans are returned with the results
+                traced_results = list(executor.map(trace_events.call_traced, [trace_events.enabled] * len(platforms), [export_platform_archive] * len(platforms), platforms, sample_dirs_args, output_root_args))
+            exported_by_platform = []
+            for exported, worker_events in traced_results:
+                trace_events.add_events(worker_events)
+                exported_by_platform.append(exported)
+        else:
+            exported_by_platform = list(map(export_platform_archive, platforms, sample_dirs_args, output_root_args))
+        for platform, exported in zip(platforms, exported_by_platform):
+            print(f"{platform}: exported {len([name for name in exported if name is not None])} samples")
+        if args.trace:
+            trace_events.save_trace(args.trace)
+        return
+
+    for platform in platforms:
+        os.makedirs(os.path.join(args.output_root, platform), exist_ok=True)
+
+    platform_args = [item[0] for item in work_items]
+    sample_dir_args = [item[1] for item in work_items]
+    output_root_args = [args.output_root] * len(work_items)
+    zip_mode_args = [args.zip] * len(work_items)
+    copy_strategy_args = [args.copy_strategy] * len(work_items)
+    if args.jobs > 1 and len(work_items) > 1:
+        with ProcessPoolExecutor(max_workers=args.jobs) as executor:
+            # worker spans are returned with the results
+            traced_results = list(executor.map(trace_events.call_traced, [trace_events.enabled] * len(work_items), [export_sample] * len(work_items), platform_args, sample_dir_args, output_root_args, zip_mode_args, copy_strategy_args, chunksize=8))
+        exported = []
+        for name, worker_events in traced_results:
+            trace_events.add_events(worker_events)
+            exported.append(name)
+    else:
+        exported = list(map(export_sample, platform_args, sample_dir_args, output_root_args, zip_mode_args, copy_strategy_args))
+
+    # write a build script per platform, listing the samples in the same order as a serial run
+    for platform in platforms:
+        list_of_samples = [name for (item_platform, _), name in zip(work_items, exported) if item_platform == platform and name is not None]
+        write_build_script(list_of_samples, platform, os.path.join(args.output_root, platform))
+        print(f"{platform}: exported {len(list_of_samples)} samples")
+    if args.trace:
+        trace_events.save_trace(args.trace)
+
+if __name__ == "__main__":
+    main()
@@ -1,27 +1,15 @@
 from sample_metadata import *
+from sample_index import get_index, get_platform_samples_root, cached_listdir
+import trace_events
+from trace_events import span
 import urllib.parse
-import sys
+from concurrent.futures import ProcessPoolExecutor
+import argparse
+import hashlib
 import os
 
-def get_platform_samples_root(platform, sample_root):
-    '''
-    Gets the root directory for each platform
-    '''
-    if (platform == "UWP"):
-        return os.path.join(sample_root, "UWP", "ArcGISRuntime.UWP.Viewer", "Samples")
-    if (platform == "WPF"):
-        return os.path.join(sample_root, "WPF", "ArcGISRuntime.WPF.Viewer", "Samples")
-    if (platform == "Android"):
-        return os.path.join(sample_root, "Android", "Xamarin.Android", "Samples")
-    if (platform == "iOS"):
-        return os.path.join(sample_root, "iOS", "Xamarin.iOS", "Samples")
-    if (platform == "Forms" or platform in ["XFA", "XFI", "XFU"]):
-        return os.path.join(sample_root, "Forms", "Shared", "Samples")
-    if (platform == "FormsAR"):
-        return os.path.join(sample_root, "Forms", "AugmentedReality")   
-    if (platform == "WinUI"):
-        return os.path.join(sample_root, "WinUI", "ArcGISRuntime.WinUI.Viewer", "Samples")     
-    raise AssertionError(None, None)
+# Bump when the manifest layout changes; older manifests are discarded.
+manifest_version = 2
 
 def get_relative_path_to_samples_from_platform_root(platform):
     '''
@@ -57,6 +45,16 @@ def write_build_script(list_of_samples, platform, output_dir):
     output_dir: platform-specific output folder containing sample solutions
     list_of_samples: flat list of sample formal names; should correspond to directories
     '''
+    file_name = os.path.join(output_dir, "BuildAll_CSharp.bat")
+
+    with open(file_name, 'w+') as output_file:
+        output_file.write(get_build_script(list_of_samples, platform))
+
+def get_build_script(list_of_samples, platform):
+    '''
+    Returns the contents of the script that restores and builds each sample solution for a platform
+    list_of_samples: flat list of sample formal names; should correspond to directories
+    '''
     output_string = "@echo on"
     output_string += "\nREM Set up environment variables for Visual Studio."
     output_string += "\ncall \"C:\\Program Files (x86)\\Microsoft Visual Studio\\2017\\Enterprise\\Common7\\Tools\\VsDevCmd.bat\""
@@ -69,10 +67,7 @@ def write_build_script(list_of_samples, platform, output_dir):
         output_string += f"\nREM Building: {sample}"
         output_string += f"\nmsbuild {plat_to_msbuild_string(platform)} /clp:errorsonly /flp2:errorsonly;logfile=%ESRI_SAMPLES_TEMP_BUILD_ROOT%\\{platform}\\build.log;append {sample}\\{sample}.sln"
     
-    file_name = os.path.join(output_dir, "BuildAll_CSharp.bat")
-
-    with open(file_name, 'w+') as output_file:
-        output_file.write(output_string)
+    return output_string
 
 def write_samples_toc(platform_dir, relative_path_to_samples, samples_in_categories):
     '''
@@ -100,28 +95,37 @@ def write_samples_toc(platform_dir, relative_path_to_samples, samples_in_categor
     readme_text = readme_text[:-1]   
 
     readme_path = os.path.join(platform_dir, "../..", "readme.md")
-    with open(readme_path, 'w+') as file:
-        file.write(readme_text)
+    return write_if_changed(readme_path, readme_text)
 
-def update_attribute(sample, sample_dir):
-    try:
-        # Get the formal name of the sample
-        if '\\' in sample_dir:
-            name = sample_dir.split('\\')[-1]
-        elif  '/' in sample_dir:
-            name = sample_dir.split('/')[-1]
-
-        # Get the correct file ending
-        if "Xamarin.iOS" in sample_dir or "Xamarin.Android" in sample_dir:
-            ending = ".cs"
-        else:
-            ending = ".xaml.cs"
+def get_attribute_source_path(sample_dir):
+    '''
+    Gets the path to the code file that holds the sample's attributes
+    '''
+    # Get the formal name of the sample
+    if '\\' in sample_dir:
+        name = sample_dir.split('\\')[-1]
+    elif  '/' in sample_dir:
+        name = sample_dir.split('/')[-1]
+
+    # Get the correct file ending
+    if "Xamarin.iOS" in sample_dir or "Xamarin.Android" in sample_dir:
+        ending = ".cs"
+    else:
+        ending = ".xaml.cs"
 
-        # Handle edge case with AR samples
-        name = name.replace("NavigateAR", "RoutePlanner").replace("ViewHiddenInfrastructureAR", "PipePlacer")
+    # Handle edge case with AR samples
+    name = name.replace("NavigateAR", "RoutePlanner").replace("ViewHiddenInfrastructureAR", "PipePlacer")
 
+    return os.path.join(sample_dir, name + ending)
+
+def update_attribute(sample, sample_dir):
+    '''
+    Rewrites the Sample attribute in the sample's code file from the sample's metadata.
+    Returns the write_if_changed result; "skipped" if the file couldn't be updated.
+    '''
+    try:
         # Open the file
-        path_to_source = os.path.join(sample_dir, name + ending)
+        path_to_source = get_attribute_source_path(sample_dir)
 
         with open(path_to_source, 'r') as f:
             lines = f.readlines()
@@ -190,72 +194,271 @@ def update_attribute(sample, sample_dir):
                 i=i+1
             f.close()
 
-        # Rewrite the file with updated attributes.
-        with open(path_to_source, "w") as file:
-            file.seek(0)
-            file.write(''.join(lines))
-            file.close()
+        # Rewrite the file with updated attributes, if they changed.
+        return write_if_changed(path_to_source, ''.join(lines))
 
     except Exception as e:
         print("Error with sample: "+sample_dir+"-"+str(e))
+        return "skipped"
+
+def get_tools_fingerprint():
+    '''
+    Hashes every script in this folder (the metadata scripts and the shared modules they use, e.g. readme_parser
+    and sample_index), so that changing any of them invalidates the manifest
+    '''
+    script_location = os.path.dirname(os.path.realpath(__file__))
+    hasher = hashlib.sha1()
+    for script in sorted(file for file in os.listdir(script_location) if file.endswith(".py")):
+        hasher.update(script.encode())
+        with open(os.path.join(script_location, script), 'rb') as script_file:
+            hasher.update(script_file.read())
+    return hasher.hexdigest()
+
+def get_sample_input_hash(sample_dir, source_files):
+    '''
+    Hashes everything process_metadata reads or writes for a sample:
+    the readme, the file listing, every code file snippet discovery reads (.cs, .xaml, .axml, .xml),
+    the Android layouts those files resolve to, referenced out-of-folder files (e.g. Android layouts),
+    the metadata json, and the code file holding the sample attribute
+    '''
+    hasher = hashlib.sha1()
+
+    def add_file(path):
+        hasher.update(path.encode())
+        try:
+            with open(path, 'rb') as input_file:
+                contents = input_file.read()
+        except OSError:
+            hasher.update(b"<missing>")
+            return None
+        hasher.update(contents)
+        return contents
+
+    listing = sorted(cached_listdir(sample_dir))
+    hasher.update("\n".join(listing).encode())
+    add_file(os.path.join(sample_dir, "readme.md"))
+    add_file(os.path.join(sample_dir, "readme.metadata.json"))
+    try:
+        add_file(get_attribute_source_path(sample_dir))
+    except Exception:
+        hasher.update(b"<no attribute file>")
+    for file in listing:
+        if os.path.splitext(file)[1] in [".axml", ".xaml", ".cs", ".xml"]:
+            contents = add_file(os.path.join(sample_dir, file))
+            if contents is not None and os.path.splitext(file)[1] == ".cs":
+                # which layout file a reference resolves to (or whether it resolves) depends on the layout folder
+                for layout_name in android_layout_pattern.findall(contents.decode("utf-8", "replace")):
+                    hasher.update(f"layout {layout_name}{get_android_layouts().get(layout_name, '<missing>')}".encode())
+    for file in source_files:
+        if ".." in file:
+            add_file(os.path.normpath(os.path.join(sample_dir, file)))
+    return hasher.hexdigest()
+
+def load_manifest(path_to_manifest):
+    '''
+    Reads the manifest of previously processed samples.
+    Returns an empty dictionary if the manifest is missing or was written by different tools.
+    '''
+    try:
+        with open(path_to_manifest, 'r') as manifest_file:
+            manifest = json.load(manifest_file)
+    except (OSError, ValueError):
+        return {}
+    if manifest.get("version") != manifest_version or manifest.get("tools") != get_tools_fingerprint():
+        return {}
+    return manifest.get("samples", {})
+
+def get_cached_sample(manifest_entry, sample_dir):
+    '''
+    Returns the sample and its input hash from a manifest entry if the sample's inputs are unchanged.
+    Returns (None, None) if the sample needs to be processed again.
+    '''
+    if manifest_entry is None:
+        return None, None
+    sample = sample_metadata()
+    sample.populate_from_dict(manifest_entry["sample"])
+    input_hash = get_sample_input_hash(sample_dir, sample.source_files)
+    if input_hash != manifest_entry["hash"]:
+        return None, None
+    return sample, input_hash
+
+def save_manifest(path_to_manifest, manifest_samples):
+    '''
+    manifest_samples: dictionary of manifest key to (sample_dir, sample_metadata, input hash or None)
+    Hashes are computed here, after all outputs have been written, so the next run sees them as unchanged.
+    '''
+    samples = {}
+    for key in manifest_samples.keys():
+        sample_dir, sample, input_hash = manifest_samples[key]
+        if input_hash is None:
+            # the sample was just processed; its metadata json may be new
+            get_index(sample_dir).refresh(sample_dir)
+            input_hash = get_sample_input_hash(sample_dir, sample.source_files)
+        samples[key] = {"hash": input_hash, "sample": sample.flush_to_dict()}
+
+    manifest = {"version": manifest_version, "tools": get_tools_fingerprint(), "samples": samples}
+    with open(path_to_manifest, 'w+') as manifest_file:
+        json.dump(manifest, manifest_file, sort_keys=True)
+
+def find_sample_dirs(platform_samples_root, index):
+    '''
+    Returns the paths of all sample folders (folders containing a readme.md) under the platform samples root,
+    in the order they should be processed.
+    index: sample_index.directory_index covering the platform samples root
+    '''
+    sample_dirs = []
+    skipped_categories = False
+    for r, d, f in index.walk(platform_samples_root):
+        if not skipped_categories:
+            skipped_categories = True
+            continue
+        
+        d.sort()
+        for sample_dir in d:
+            # skip category directories
+            path_to_readme = os.path.join(r, sample_dir, "readme.md")
+            if not index.exists(path_to_readme):
+                print(f"skipping path; does not exist: {path_to_readme}")
+                continue
+            sample_dirs.append(os.path.join(r, sample_dir))
+    return sample_dirs
+
+def process_sample(platform, sample_dir):
+    '''
+    Populates a sample from its readme and folder, then rewrites its metadata json and sample attribute.
+    Independent of every other sample, so it can run in a worker process.
+    Returns the sample and the write_if_changed results for the files it wrote.
+    '''
+    trace_args = {"platform": platform, "sample": os.path.basename(sample_dir)}
+    with span("sample", "sample", trace_args):
+        sample = sample_metadata()
+        path_to_readme = os.path.join(sample_dir, "readme.md")
+        with span("readme parse", "phase", trace_args):
+            sample.populate_from_readme(platform, path_to_readme)
+        if platform == "FormsAR":
+            sample.category = "Augmented reality"
+        with span("snippet discovery", "phase", trace_args):
+            sample.populate_snippets_from_folder(platform, path_to_readme)
+
+        # read existing packages from metadata
+        path_to_json = os.path.join(sample_dir, "readme.metadata.json")
+        if os.path.exists(path_to_json):
+            metadata_based_sample = sample_metadata()
+            metadata_based_sample.populate_from_json(path_to_json)
+        with span("json flush", "phase", trace_args):
+            write_results = [sample.flush_to_json(path_to_json)]
+
+        # update attributes in the sample code files
+        with span("attribute update", "phase", trace_args):
+            write_results.append(update_attribute(sample, sample_dir))
+
+    return sample, write_results
 
 def main():
     '''
-    Usage: python process_metadata.py {path_to_samples (ends in src)} (optional)
+    Usage: python process_metadata.py {path_to_samples (ends in src)} (optional) [--incremental] [--manifest {path}] [--jobs {N}] [--trace {path}]
         Location of script being run will be used for a relative path if path to samples is not specified.
+        With --incremental, samples whose inputs are unchanged since the last run are restored from the manifest instead of being reprocessed.
+        With --jobs, samples are processed on a pool of N worker processes; output is identical to a serial run.
+        With --trace, the time spent per platform, sample and phase is written to a Chrome trace file (see trace_events).
     '''
-
-    if len(sys.argv) < 2:
+    script_location = os.path.dirname(os.path.realpath(__file__))
+
+    parser = argparse.ArgumentParser(description="Updates sample metadata, sample attributes and TOCs from the sample readmes.")
+    parser.add_argument("sample_root", nargs="?", help="path to samples (ends in src)")
+    parser.add_argument("--incremental", action="store_true", help="only reprocess samples whose inputs changed since the last run")
+    parser.add_argument("--manifest", default=os.path.join(script_location, ".process_metadata_manifest.json"), help="path to the manifest used by --incremental")
+    parser.add_argument("--jobs", type=int, default=1, help="number of worker processes used to process samples")
+    parser.add_argument("--trace", help="write a Chrome trace of where the time goes to this file")
+    args = parser.parse_args()
+    if args.trace:
+        trace_events.start_tracing()
+
+    if args.sample_root is None:
         # get the location of the samples relative to this script in the tools folder
-        script_location = os.path.dirname(os.path.realpath(__file__))
         sample_root = os.path.abspath(os.path.join(script_location, "..", "..", "src"))
     else:
-        sample_root = sys.argv[1]
-
-    for platform in ["UWP", "WPF", "Android", "Forms", "iOS", "FormsAR", "WinUI"]:
-        # make a list of samples, so that build_all_csproj.bat can be produced
-        list_of_sample_dirs = []
-        list_of_samples = {}
-        skipped_categories = False
-        for r, d, f in os.walk(get_platform_samples_root(platform, sample_root)):
-            if not skipped_categories:
-                skipped_categories = True
-                continue
-            
-            d.sort()
-            for sample_dir in d:
-                # skip category directories
-                sample = sample_metadata()
-                path_to_readme = os.path.join(r, sample_dir, "readme.md")
-                if not os.path.exists(path_to_readme):
-                    print(f"skipping path; does not exist: {path_to_readme}")
-                    continue
-                sample.populate_from_readme(platform, path_to_readme)
-                if platform == "FormsAR":
-                    sample.category = "Augmented reality"
-                sample.populate_snippets_from_folder(platform, path_to_readme)
-
-                # read existing packages from metadata
-                path_to_json = os.path.join(r, sample_dir, "readme.metadata.json")
-                if os.path.exists(path_to_json):
-                    metadata_based_sample = sample_metadata()
-                    metadata_based_sample.populate_from_json(path_to_json)
-                sample.flush_to_json(path_to_json)
-
-                # update attributes in the sample code files
-                update_attribute(sample, os.path.join(r, sample_dir))
-
-                list_of_sample_dirs.append(sample_dir)
-
-                # track samples in each category to enable TOC generation
-                if sample.category in list_of_samples.keys():
-                    list_of_samples[sample.category].append(sample)
+        sample_root = args.sample_root
+
+    with span("process_metadata"):
+        write_results = process_all_samples(sample_root, args.incremental, args.manifest, args.jobs)
+    print(f"Files: {summarize_writes(write_results)}")
+    if args.trace:
+        trace_events.save_trace(args.trace)
+    return
+
+def process_all_samples(sample_root, incremental=False, path_to_manifest=None, jobs=1):
+    '''
+    Processes every sample of every platform and writes the samples TOCs.
+    Used by main, and by sample_sync to run the metadata update in the same process as the readme copy.
+    Returns the write_if_changed results for all files written.
+    '''
+    platforms = ["UWP", "WPF", "Android", "Forms", "iOS", "FormsAR", "WinUI"]
+    previous_manifest = load_manifest(path_to_manifest) if incremental else {}
+    manifest_samples = {}
+    reused_count = 0
+    write_results = []
+
+    # find every sample up front so the work can be spread across platforms and samples
+    index = get_index(sample_root)
+    work_items = [] # (platform, manifest key, sample dir, cached sample, input hash)
+    for platform in platforms:
+        with span("find samples", "platform", {"platform": platform}):
+            platform_samples_root = get_platform_samples_root(platform, sample_root)
+            for sample_dir in find_sample_dirs(platform_samples_root, index):
+                # reuse the previous result if none of the sample's inputs changed
+                manifest_key = platform + "/" + os.path.relpath(sample_dir, platform_samples_root).replace("\\", "/")
+                cached_sample, input_hash = get_cached_sample(previous_manifest.get(manifest_key), sample_dir)
+                work_items.append((platform, manifest_key, sample_dir, cached_sample, input_hash))
+
+    # process the samples that weren't reused, one platform at a time so each platform gets its own span;
+    # results come back in submission order, which is discovery order since work_items are grouped by platform
+    pending = [item for item in work_items if item[3] is None]
+    executor = ProcessPoolExecutor(max_workers=jobs) if jobs > 1 and len(pending) > 1 else None
+    processed = []
+    try:
+        for platform in platforms:
+            platform_pending = [item for item in pending if item[0] == platform]
+            with span(f"process {platform}", "platform", {"platform": platform, "samples": len(platform_pending)}):
+                if executor is None:
+                    processed += [process_sample(item[0], item[2]) for item in platform_pending]
                 else:
-                    list_of_samples[sample.category] = [sample]
-        # write out samples TOC
+                    # worker spans are returned with the results
+                    for result, worker_events in executor.map(trace_events.call_traced, [trace_events.enabled] * len(platform_pending), [process_sample] * len(platform_pending), [item[0] for item in platform_pending], [item[2] for item in platform_pending], chunksize=16):
+                        trace_events.add_events(worker_events)
+                        processed.append(result)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+    processed = iter(processed)
+
+    # merge the results back in discovery order
+    samples_by_platform = {platform: {} for platform in platforms}
+    for platform, manifest_key, sample_dir, sample, input_hash in work_items:
+        if sample is not None:
+            reused_count += 1
+        else:
+            sample, sample_write_results = next(processed)
+            write_results += sample_write_results
+        manifest_samples[manifest_key] = (sample_dir, sample, input_hash)
+
+        # track samples in each category to enable TOC generation
+        list_of_samples = samples_by_platform[platform]
+        if sample.category in list_of_samples.keys():
+            list_of_samples[sample.category].append(sample)
+        else:
+            list_of_samples[sample.category] = [sample]
+
+    # write out samples TOC
+    for platform in platforms:
         if platform != "FormsAR":
-            write_samples_toc(get_platform_samples_root(platform, sample_root), get_relative_path_to_samples_from_platform_root(platform), list_of_samples)
-    return
+            with span("TOC write", "platform", {"platform": platform}):
+                write_results.append(write_samples_toc(get_platform_samples_root(platform, sample_root), get_relative_path_to_samples_from_platform_root(platform), samples_by_platform[platform]))
+
+    if incremental:
+        save_manifest(path_to_manifest, manifest_samples)
+        print(f"Reused {reused_count} of {len(manifest_samples)} samples from {path_to_manifest}")
+    return write_results
 
 if __name__ == "__main__":
-    main()
+    main()
\ No newline at end of file
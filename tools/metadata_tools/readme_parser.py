@@ -0,0 +1,106 @@
+'''
+Parses a sample readme.md once into a parsed_readme.
+Used by sample_metadata and the CI style checkers (README_style_checker, metadata_style_checker),
+so a sync or CI run parses each readme a single time. Parsed readmes are cached by content hash.
+'''
+import hashlib
+import os
+import re
+
+# Matches exactly 2 pound marks at the start of a line, capturing the header text.
+section_header_pattern = re.compile(r'^#{2}(?!#)\s(.*)', re.MULTILINE)
+
+# ArcGIS Online item IDs (GUIDs without dashes), as listed in the 'Offline data' section.
+item_id_pattern = re.compile('[0-9a-f]{8}[0-9a-f]{4}[1-5][0-9a-f]{3}[89ab][0-9a-f]{3}[0-9a-f]{12}', re.I)
+
+class parsed_readme:
+    '''
+    A readme split into its parts.
+    contents: the full text
+    paragraphs: the text split on blank lines (used by sample_metadata)
+    parts: [head, header, body, header, body, ...], split on '## ' section headers (used by the style checkers)
+    headers: the section headers, in order
+    sections: list of (header, body), in order
+    title, description, image: the first three non-empty lines of the head; None if the head is shorter than that
+    apis: the entries of the 'Relevant API' section, in order, without bullets
+    tags: the comma-separated entries of the 'Tags' section, in order
+    offline_data: the item IDs in the 'Offline data' section, without duplicates
+    '''
+
+    def __init__(self, contents):
+        self.contents = contents
+        self.paragraphs = contents.split("\n\n") # a blank line is two newlines
+        self.parts = section_header_pattern.split(contents)
+        self.headers = self.parts[1::2]
+        self.sections = list(zip(self.parts[1::2], self.parts[2::2]))
+
+        head_lines = [line for line in self.parts[0].splitlines() if line]
+        self.title = None
+        self.description = None
+        self.image = None
+        if len(head_lines) >= 3:
+            self.title = head_lines[0].lstrip('# ').rstrip()
+            self.description = head_lines[1].strip()
+            self.image = head_lines[2].strip()
+
+        self.apis = []
+        apis_section = self.get_section('Relevant API')
+        if apis_section is not None:
+            self.apis = [api.lstrip('*- ').rstrip() for api in apis_section.splitlines() if api]
+
+        self.tags = []
+        tags_section = self.get_section('Tags')
+        if tags_section is not None:
+            self.tags = [tag.strip() for tag in tags_section.split(',')]
+
+        self.offline_data = []
+        offline_data_section = self.get_section('Offline data')
+        if offline_data_section is not None:
+            self.offline_data = list(dict.fromkeys(item_id_pattern.findall(offline_data_section)))
+
+    def get_section(self, header):
+        '''
+        Returns the body of the first section with the given header, or None if there isn't one
+        '''
+        for section_header, body in self.sections:
+            if section_header == header:
+                return body
+        return None
+
+# Readmes parsed by this process, keyed by the hash of their contents.
+parsed_readmes = {}
+
+def parse_readme_contents(contents):
+    '''
+    Parses readme text, reusing the result if the same text was already parsed
+    '''
+    key = hashlib.sha1(contents.encode("utf-8", "surrogatepass")).hexdigest()
+    if key not in parsed_readmes:
+        parsed_readmes[key] = parsed_readme(contents)
+    return parsed_readmes[key]
+
+# Readme text provided in place of the file on disk, keyed by absolute path (see prime_readme).
+primed_readmes = {}
+
+def prime_readme(path_to_readme, contents):
+    '''
+    Makes read_readme and parse_readme return contents for the path instead of reading the file,
+    e.g. for a readme that an earlier stage of a pipeline generated but hasn't written yet
+    '''
+    primed_readmes[os.path.abspath(path_to_readme)] = contents
+
+def read_readme(path_to_readme):
+    '''
+    Returns the text of a readme: the primed contents if there are any, otherwise the file. Raises if the file can't be read.
+    '''
+    key = os.path.abspath(path_to_readme)
+    if key in primed_readmes:
+        return primed_readmes[key]
+    with open(path_to_readme, "r") as readme_file:
+        return readme_file.read()
+
+def parse_readme(path_to_readme):
+    '''
+    Reads and parses a readme file. Raises if the file can't be read.
+    '''
+    return parse_readme_contents(read_readme(path_to_readme))
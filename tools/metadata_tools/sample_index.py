@@ -0,0 +1,178 @@
+'''
+Single-pass, in-memory index of the samples tree.
+Walks a folder once with os.scandir and answers the listing questions the sample tools ask
+(listdir, walk, file sizes and modification times) without going back to the file system.
+Used by process_metadata, readme_copy, samplegen, screenshot_check and the CI style checkers.
+'''
+import os
+from collections import namedtuple
+
+# All of the platforms that have a sample viewer, in the order they are processed.
+platforms = ["UWP", "WPF", "Android", "Forms", "iOS", "FormsAR", "WinUI"]
+
+# Size (bytes) and modification time (seconds since epoch) of an indexed file.
+file_info = namedtuple("file_info", ["size", "mtime"])
+
+def get_platform_root(platform, sample_root):
+    '''
+    Gets the root directory of the viewer project for each platform
+    '''
+    if (platform == "UWP"):
+        return os.path.join(sample_root, "UWP", "ArcGISRuntime.UWP.Viewer")
+    if (platform == "WPF"):
+        return os.path.join(sample_root, "WPF", "ArcGISRuntime.WPF.Viewer")
+    if (platform == "Android"):
+        return os.path.join(sample_root, "Android", "Xamarin.Android")
+    if (platform == "Forms"):
+        return os.path.join(sample_root, "Forms", "Shared")
+    if (platform == "iOS"):
+        return os.path.join(sample_root, "iOS", "Xamarin.iOS")
+    if (platform == "WinUI"):
+        return os.path.join(sample_root, "WinUI", "ArcGISRuntime.WinUI.Viewer")
+    return ""
+
+def get_platform_samples_root(platform, sample_root):
+    '''
+    Gets the root directory for each platform
+    '''
+    if (platform == "UWP"):
+        return os.path.join(sample_root, "UWP", "ArcGISRuntime.UWP.Viewer", "Samples")
+    if (platform == "WPF"):
+        return os.path.join(sample_root, "WPF", "ArcGISRuntime.WPF.Viewer", "Samples")
+    if (platform == "Android"):
+        return os.path.join(sample_root, "Android", "Xamarin.Android", "Samples")
+    if (platform == "iOS"):
+        return os.path.join(sample_root, "iOS", "Xamarin.iOS", "Samples")
+    if (platform == "Forms" or platform in ["XFA", "XFI", "XFU"]):
+        return os.path.join(sample_root, "Forms", "Shared", "Samples")
+    if (platform == "FormsAR"):
+        return os.path.join(sample_root, "Forms", "AugmentedReality")
+    if (platform == "WinUI"):
+        return os.path.join(sample_root, "WinUI", "ArcGISRuntime.WinUI.Viewer", "Samples")
+    raise AssertionError(None, None)
+
+class directory_index:
+    '''
+    Every folder and file under a root folder, read with one os.scandir pass.
+    Paths returned by walk() are built from the path passed in, the same way os.walk does,
+    so callers can switch from os.walk/os.listdir without changing their output.
+    '''
+
+    def __init__(self, root):
+        self.root = os.path.abspath(root)
+        # absolute folder path -> (entry names in scandir order, sub-folder names, {file name: file_info})
+        self.directories = {}
+        pending = [self.root]
+        while pending:
+            pending.extend(self.scan_directory(pending.pop()))
+
+    def scan_directory(self, path):
+        '''
+        Reads a single folder into the index; returns the sub-folders that still need to be scanned
+        '''
+        names = []
+        subdirectories = []
+        files = {}
+        try:
+            with os.scandir(path) as entries:
+                for entry in entries:
+                    names.append(entry.name)
+                    if entry.is_dir():
+                        subdirectories.append(entry.name)
+                    else:
+                        stat = entry.stat()
+                        files[entry.name] = file_info(stat.st_size, stat.st_mtime)
+        except OSError:
+            # unreadable folders are skipped, like os.walk does
+            return []
+        self.directories[path] = (names, subdirectories, files)
+        # like os.walk, don't follow symbolic links to folders
+        return [os.path.join(path, name) for name in subdirectories if not os.path.islink(os.path.join(path, name))]
+
+    def refresh(self, path):
+        '''
+        Re-reads a single folder (not its sub-folders), e.g. after files were written to it
+        '''
+        self.scan_directory(os.path.abspath(path))
+
+    def contains(self, path):
+        '''
+        True if the path is a folder inside the indexed tree
+        '''
+        return os.path.abspath(path) in self.directories
+
+    def listdir(self, path):
+        '''
+        Same as os.listdir, for an indexed folder
+        '''
+        key = os.path.abspath(path)
+        if key not in self.directories:
+            raise FileNotFoundError(f"Not an indexed folder: {path}")
+        return list(self.directories[key][0])
+
+    def subdirectories(self, path):
+        '''
+        Names of the folders directly inside an indexed folder
+        '''
+        key = os.path.abspath(path)
+        if key not in self.directories:
+            return []
+        return list(self.directories[key][1])
+
+    def files(self, path):
+        '''
+        Dictionary of file name to file_info for the files directly inside an indexed folder
+        '''
+        key = os.path.abspath(path)
+        if key not in self.directories:
+            return {}
+        return dict(self.directories[key][2])
+
+    def exists(self, path):
+        '''
+        True if the path is an indexed folder or file
+        '''
+        key = os.path.abspath(path)
+        if key in self.directories:
+            return True
+        parent, name = os.path.split(key)
+        return parent in self.directories and name in self.directories[parent][2]
+
+    def walk(self, top):
+        '''
+        Same as os.walk(top) (top-down), for an indexed folder.
+        As with os.walk, callers may sort or prune the yielded folder list to control the descent.
+        '''
+        key = os.path.abspath(top)
+        if key not in self.directories:
+            return
+        names, subdirectories, files = self.directories[key]
+        dirs = list(subdirectories)
+        yield top, dirs, [name for name in names if name in files]
+        for name in dirs:
+            yield from self.walk(os.path.join(top, name))
+
+# Indexes already built in this process, keyed by absolute root path.
+indexes = {}
+
+def get_index(root):
+    '''
+    Returns the index for a folder, scanning it on first use.
+    Folders inside an already-indexed tree are served from that tree's index.
+    '''
+    key = os.path.abspath(root)
+    if key not in indexes:
+        for index in indexes.values():
+            if index.contains(key):
+                return index
+        indexes[key] = directory_index(key)
+    return indexes[key]
+
+def cached_listdir(path):
+    '''
+    os.listdir, answered from an existing index when the folder has been indexed.
+    '''
+    for index in indexes.values():
+        if index.contains(path):
+            return index.listdir(path)
+    return os.listdir(path)
@@ -1,11 +1,41 @@
 import json
 import os
-from distutils.dir_util import copy_tree
-from shutil import copyfile, rmtree
+from shutil import rmtree
 import re
+import zipfile
 from datetime import datetime
 from csproj_utils import *
 from file_utils import *
+from sample_index import cached_listdir
+from readme_parser import parse_readme
+from solution_template import solution_template
+from trace_events import span
+
+# Matches references to Android layouts from sample code, capturing the layout name:
+# SetContentView(Resource.Layout.X), SetContentView(ArcGISRuntime.Resource.Layout.X) and .Inflate(Resource.Layout.X, null)
+android_layout_pattern = re.compile(r"(?:SetContentView\((?:ArcGISRuntime\.)?|\.Inflate\()Resource\.Layout\.(\w+)")
+
+# Android layout name -> file extension (.xml or .axml); read from the layout folder on first use
+android_layouts = None
+
+def get_android_layouts():
+    '''
+    Lists the Android layout folder once; .xml layouts take precedence over .axml layouts with the same name
+    '''
+    global android_layouts
+    if android_layouts is None:
+        layout_dir = os.path.join(os.path.dirname(os.path.realpath(__file__)), "..", "..", "src", "Android", "Xamarin.Android", "Resources", "layout")
+        android_layouts = {}
+        try:
+            layout_files = cached_listdir(layout_dir)
+        except OSError:
+            layout_files = []
+        for ending in [".axml", ".xml"]:
+            for file in layout_files:
+                name, extension = os.path.splitext(file)
+                if extension == ending:
+                    android_layouts[name] = ending
+    return android_layouts
 
 class sample_metadata:
     '''
@@ -58,6 +88,14 @@ class sample_metadata:
                 self.source_files = data["snippets"]
 
         return
+
+    def populate_from_dict(self, record):
+        '''
+        Restores a sample previously saved with flush_to_dict (e.g. from the process_metadata manifest)
+        '''
+        self.reset_props()
+        for key in record.keys():
+            setattr(self, key, record[key])
     
     def populate_from_readme(self, platform, path_to_readme):
         # formal name is the name of the folder containing the json
@@ -90,19 +128,16 @@ class sample_metadata:
          # Correct category metadata for categories with spaces
         self.category = self.category.replace("LocalServer", "Local Server").replace("NetworkAnalysis", "Network analysis").replace("UtilityNetwork", "Utility network").replace("AugmentedReality", "Augmented reality")
 
-        # read the readme content into a string
-        readme_contents = ""
+        # read and parse the readme
         try:
-            readme_file = open(path_to_readme, "r")
-            readme_contents = readme_file.read()
-            readme_file.close()
+            readme = parse_readme(path_to_readme)
         except Exception as err:
             # not a sample, skip
             print(f"Error populating sample from readme - {path_to_readme} - {err}")
             return
 
         # break into sections
-        readme_parts = readme_contents.split("\n\n") # a blank line is two newlines
+        readme_parts = readme.paragraphs
 
         # extract human-readable name
         title_line = readme_parts[0].strip()
@@ -162,50 +197,126 @@ class sample_metadata:
         data["offline_data"] = self.offline_data
         data["formal_name"] = self.formal_name
 
-        with open(path_to_json, 'w+') as json_file:
-            json.dump(data, json_file, indent=4, sort_keys=True)
+        # only rewrite the json when it changed; returns the write_if_changed result
+        return write_if_changed(path_to_json, json.dumps(data, indent=4, sort_keys=True))
 
-        return
+    def flush_to_dict(self):
+        '''
+        Returns all of the sample's properties as a json-serializable dictionary
+        '''
+        return dict(vars(self))
     
-    def emit_standalone_solution(self, platform, sample_dir, output_root):
+    def emit_standalone_solution(self, platform, sample_dir, output_root, template=None, archive=None, copy_strategy="copy"):
         '''
         Produces a standalone sample solution for the given sample
         platform: one of: Android, iOS, UWP, WPF, XFA, XFI, XFU
         output_root: output folder; should not be specific to the platform
         sample_dir: path to the folder containing the sample's code
+        template: solution_template for the platform; pass one in when exporting many samples so the template is only read once
+        archive: optional zipfile.ZipFile; when given, the solution is written into the archive under a {formal_name}/ folder
+                 instead of to output_root, and nothing is written to disk
+        copy_strategy: how files that need no replacements are copied; one of file_utils.copy_strategies
         '''
-        # create output dir
-        output_dir = os.path.join(output_root, platform, self.formal_name)
+        trace_args = {"platform": platform, "sample": self.formal_name}
+        with span("export", "sample", trace_args):
+            # generate list of replacements
+            replacements = self.get_solution_replacements(platform)
 
-        if os.path.exists(output_dir):
-            rmtree(output_dir)
-        
-        os.makedirs(output_dir)
+            if template is None:
+                template = solution_template(platform)
+
+            if archive is not None:
+                self.emit_standalone_solution_to_archive(platform, sample_dir, archive, template, replacements)
+                return
 
-        # copy template files over - find files in template
-        script_dir = os.path.split(os.path.realpath(__file__))[0]
-        template_dir = os.path.join(script_dir, "templates", "solutions", platform)
-        copy_tree(template_dir, output_dir)
+            # create output dir
+            output_dir = os.path.join(output_root, platform, self.formal_name)
 
-        # copy sample files over
-        copy_tree(sample_dir, output_dir)
+            if os.path.exists(output_dir):
+                rmtree(output_dir)
+            
+            os.makedirs(output_dir)
+
+            # write template files - tags in names and contents are replaced as they are written
+            with span("template copy", "phase", trace_args):
+                template.write_to(output_dir, replacements, copy_strategy)
+
+            # copy sample files over, replacing template fields
+            with span("rewrite", "phase", trace_args):
+                replace_all = sample_metadata.compile_replacements(replacements)
+                for r, d, f in os.walk(sample_dir):
+                    relative_dir = os.path.relpath(r, sample_dir)
+                    os.makedirs(os.path.join(output_dir, relative_dir), exist_ok=True)
+                    for file_name in f:
+                        dest_path = os.path.normpath(os.path.join(output_dir, relative_dir, replace_all(file_name)))
+                        sample_metadata.copy_file_with_replacements(os.path.join(r, file_name), dest_path, replace_all, copy_strategy)
+
+                # copy any out-of-dir files over (e.g. Android layouts, download manager)
+                for file in self.source_files:
+                    if ".." in file:
+                        dest_path = os.path.join(output_dir, sample_metadata.get_out_of_dir_destination(file))
+                        os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+                        sample_metadata.copy_file_with_replacements(os.path.join(sample_dir, file), dest_path, replace_all, copy_strategy)
+
+            # write out the sample file
+            self.emit_dot_sample_file(platform, output_dir)
+
+        return
 
-        # copy any out-of-dir files over (e.g. Android layouts, download manager)
-        if len(self.source_files) > 0:
+    def emit_standalone_solution_to_archive(self, platform, sample_dir, archive, template, replacements):
+        '''
+        Streams a standalone sample solution into a zip archive; see emit_standalone_solution.
+        Renames and template replacements are applied in memory.
+        '''
+        trace_args = {"platform": platform, "sample": self.formal_name}
+        replace_all = sample_metadata.compile_replacements(replacements)
+
+        # relative path -> bytes; later entries replace earlier ones, like copying the sample over the template
+        entries = {}
+        with span("template copy", "phase", trace_args):
+            for relative_path, content in template.render(replacements):
+                entries[relative_path] = content
+
+        with span("rewrite", "phase", trace_args):
+            # sample files
+            for r, d, f in os.walk(sample_dir):
+                for file_name in f:
+                    source_path = os.path.join(r, file_name)
+                    relative_dir = os.path.relpath(r, sample_dir)
+                    relative_path = os.path.normpath(os.path.join(relative_dir, replace_all(file_name)))
+                    entries[relative_path] = sample_metadata.render_file(source_path, replace_all)
+
+            # out-of-dir files (e.g. Android layouts, download manager)
             for file in self.source_files:
                 if ".." in file:
-                    source_path = os.path.join(sample_dir, file)
-                    dest_path = os.path.join(output_dir, "Resources", "layout", os.path.split(file)[1])
-                    if 'Attrs.xml' in file: # todo: improve this
-                        dest_path = os.path.join(output_dir, "Resources", "values", os.path.split(file)[1])
-                    elif file.endswith('.cs'):
-                        dest_path = os.path.join(output_dir, "Controls", os.path.split(file)[1])
-                    copyfile(source_path, dest_path)
+                    relative_path = sample_metadata.get_out_of_dir_destination(file)
+                    entries[relative_path] = sample_metadata.render_file(os.path.join(sample_dir, file), replace_all)
+
+        # the sample file
+        entries[f"{self.formal_name}.sample"] = encode_text(self.get_dot_sample_xml(platform))
+
+        with span("archive write", "phase", trace_args):
+            self.write_archive_entries(archive, entries)
+
+    def write_archive_entries(self, archive, entries):
+        '''
+        Writes {relative path: bytes} into the archive under the sample's {formal_name}/ folder
+        '''
+        for relative_path in entries.keys():
+            archive_name = self.formal_name + "/" + relative_path.replace(os.sep, "/")
+            # images are already compressed; deflating them again costs time for no gain
+            if os.path.splitext(relative_path)[1].lower() in [".jpg", ".jpeg", ".png", ".gif"]:
+                archive.writestr(archive_name, entries[relative_path], zipfile.ZIP_STORED)
+            else:
+                archive.writestr(archive_name, entries[relative_path])
 
+    def get_solution_replacements(self, platform):
+        '''
+        Returns the template tags and their replacements for this sample's standalone solution
+        '''
         # accumulate list of source, xaml, axml, and resource files
         all_source_files = self.source_files
 
-        # generate list of replacements
         replacements = {}
         replacements["$$project$$"] = self.formal_name
         replacements[".slntemplate"] = ".sln" # replacement needed to prevent template solutions from appearing in Visual Studio git browser
@@ -214,16 +325,53 @@ class sample_metadata:
         replacements["$$axml_files$$"] = get_csproj_xml_for_android_layout(all_source_files)
         replacements["$$current_year$$"] = str(datetime.now().year)
         replacements["$$friendly_name$$"] = self.friendly_name
+        return replacements
 
-        # rewrite files in output - replace template fields
-        sample_metadata.rewrite_files_in_place(output_dir, replacements)
-
-        # write out the sample file
-        self.emit_dot_sample_file(platform, output_dir)
-
-        return
+    def get_out_of_dir_destination(file):
+        '''
+        Returns where an out-of-dir source file (e.g. ../../../Resources/layout/x.axml) goes, relative to the solution folder
+        '''
+        dest_path = os.path.join("Resources", "layout", os.path.split(file)[1])
+        if 'Attrs.xml' in file: # todo: improve this
+            dest_path = os.path.join("Resources", "values", os.path.split(file)[1])
+        elif file.endswith('.cs'):
+            dest_path = os.path.join("Controls", os.path.split(file)[1])
+        return dest_path
+
+    def copy_file_with_replacements(source_path, dest_path, replace_all, copy_strategy):
+        '''
+        Writes a file to dest_path with template replacements applied.
+        Files that come out unchanged (images, most code files) are copied with the copy strategy instead of being rewritten.
+        '''
+        if os.path.splitext(source_path)[1] in solution_template.text_extensions:
+            original_contents = safe_read_contents(source_path)
+            new_content = replace_all(original_contents)
+            if new_content != original_contents:
+                if os.path.lexists(dest_path):
+                    os.remove(dest_path)
+                safe_write_contents(dest_path, new_content, like_file=source_path)
+                return
+        copy_file(source_path, dest_path, copy_strategy)
+
+    def render_file(source_path, replace_all):
+        '''
+        Returns the bytes of a file with template replacements applied, without writing anything.
+        Files that aren't rewritten by rewrite_file_in_place are returned unchanged.
+        '''
+        if os.path.splitext(source_path)[1] in solution_template.text_extensions:
+            original_contents = safe_read_contents(source_path)
+            new_content = replace_all(original_contents)
+            if new_content != original_contents:
+                return encode_text(new_content, source_path)
+        with open(source_path, 'rb') as source_file:
+            return source_file.read()
     
     def emit_dot_sample_file(self, platform, output_dir):
+        filename = os.path.join(output_dir, f"{self.formal_name}.sample")
+
+        safe_write_contents(filename, self.get_dot_sample_xml(platform))
+
+    def get_dot_sample_xml(self, platform):
         output_xml = "<ArcGISRuntimeSDKdotNetSample>\n"
         # basic metadata
         output_xml += f"\t<SampleName>{self.formal_name}</SampleName>\n"
@@ -254,9 +402,7 @@ class sample_metadata:
         
         output_xml += "</ArcGISRuntimeSDKdotNetSample>\n"
 
-        filename = os.path.join(output_dir, f"{self.formal_name}.sample")
-
-        safe_write_contents(filename, output_xml)
+        return output_xml
     
     def populate_snippets_from_folder(self, platform, path_to_readme):
         '''
@@ -266,36 +412,21 @@ class sample_metadata:
         '''
         # populate files in the directory
         sample_dir = os.path.split(path_to_readme)[0]
-        for file in os.listdir(sample_dir):
+        for file in cached_listdir(sample_dir):
             if os.path.splitext(file)[1] in [".axml", ".xaml", ".cs", ".xml"]:
                 self.source_files.append(file)        
             # populate AXML layouts for Android
             if platform == "Android" and os.path.splitext(file)[1] == ".cs":
-                # search for line matching SetContentView(Resource.Layout.
+                # find the layouts set with SetContentView or inflated by the code
                 referencing_file_path = os.path.join(sample_dir, file)
                 referencing_file_contents = safe_read_contents(referencing_file_path)
-                for line in referencing_file_contents.split("\n"):
-                    layout_name = None
-                    if "SetContentView(Resource.Layout." in line:
-                        # extract name of layout
-                        layout_name = line.split("Layout.")[1].strip().strip(";").strip(")")
-                    elif "SetContentView(ArcGISRuntime.Resource.Layout." in line:
-                        # extract name of layout
-                        layout_name = line.split("Layout.")[1].strip().strip(";").strip(")")
-                    elif ".Inflate(Resource.Layout." in line:
-                        # extract name of layout
-                        layout_name = line.split("Layout.")[1].strip().strip(";").strip(", null)")
-                    if layout_name is not None:
-                        # determine if the file ending is .xml
-                        if (os.path.exists(os.path.join(os.path.dirname(os.path.realpath(__file__)), "..", "..", "src", "Android", "Xamarin.Android", "Resources", "layout", f"{layout_name}.xml"))):
-                            ending = ".xml"
-                        elif (os.path.exists(os.path.join(os.path.dirname(os.path.realpath(__file__)), "..", "..", "src", "Android", "Xamarin.Android", "Resources", "layout", f"{layout_name}.axml"))):
-                            ending = ".axml"
-                        else:
-                            print(f"Couldnt find layout file for sample {layout_name}")
-                            continue
-                        # add the file path to the snippets list
-                        self.source_files.append(f"../../../Resources/layout/{layout_name}{ending}")
+                android_layouts = get_android_layouts()
+                for layout_name in android_layout_pattern.findall(referencing_file_contents):
+                    if layout_name not in android_layouts:
+                        print(f"Couldnt find layout file for sample {layout_name}")
+                        continue
+                    # add the file path to the snippets list
+                    self.source_files.append(f"../../../Resources/layout/{layout_name}{android_layouts[layout_name]}")
         # Manually add JoystickSeekBar control on Android for AR only
         if platform == "Android" and self.formal_name in ["NavigateAR", "CollectDataAR", "ViewHiddenInfrastructureAR"]:
             self.source_files.append("../../../Resources/values/Attrs.xml")
@@ -304,35 +435,48 @@ class sample_metadata:
             self.source_files.append("../../../Helpers/ArcGISLoginPrompt.cs")
         self.source_files.sort()
 
+    def compile_replacements(replacements_dict):
+        '''
+        Compiles a dictionary of strings and replacements into a single pattern.
+        Returns a function that applies all of the replacements to a string in one scan.
+        Longer tags are tried first, so a tag that contains another tag takes precedence.
+        '''
+        if len(replacements_dict) == 0:
+            return lambda text: text
+        tags = sorted(replacements_dict.keys(), key=len, reverse=True)
+        pattern = re.compile("|".join(re.escape(tag) for tag in tags))
+        return lambda text: pattern.sub(lambda match: replacements_dict[match.group(0)], text)
+
     def rewrite_files_in_place(source_dir, replacements_dict):
         '''
         Takes a dictionary of strings and replacements, applies the replacements to all the files in a directory.
         Used when generating sample solutions.
         '''
+        replace_all = sample_metadata.compile_replacements(replacements_dict)
+        # os.walk already descends into sub-directories, so each file is visited exactly once
         for r, d, f in os.walk(source_dir):
-            for sample_dir in d:
-                sample_metadata.rewrite_files_in_place(os.path.join(r, sample_dir), replacements_dict)
             for sample_file_name in f:
-                sample_file_fullpath = os.path.join(r, sample_file_name)
-                extension = os.path.splitext(sample_file_fullpath)[1]
-                if extension in [".cs", ".xaml", ".sln", ".slntemplate", ".md", ".csproj", ".shproj", ".axml", ".xml"]:
-                    # open file, read into string
-                    original_contents = safe_read_contents(sample_file_fullpath)
-                    # make replacements
-                    new_content = original_contents
-                    for tag in replacements_dict.keys():
-                        new_content = new_content.replace(tag, replacements_dict[tag])
-                    # write out new file
-                    if new_content != original_contents:
-                        os.remove(sample_file_fullpath)
-                        safe_write_contents(sample_file_fullpath, new_content)
-                # rename any files (e.g. $$project$$.sln becomes AccessLoadStatus.sln)
-                new_name = sample_file_fullpath
-                for tag in replacements_dict.keys():
-                    if tag in sample_file_fullpath:
-                        new_name = new_name.replace(tag, replacements_dict[tag])
-                if new_name != sample_file_fullpath:
-                    os.rename(sample_file_fullpath, new_name)
+                sample_metadata.rewrite_file_in_place(os.path.join(r, sample_file_name), replace_all)
+
+    def rewrite_file_in_place(sample_file_fullpath, replace_all):
+        '''
+        Applies replacements (a function from compile_replacements) to a single file's contents and name.
+        '''
+        extension = os.path.splitext(sample_file_fullpath)[1]
+        if extension in solution_template.text_extensions:
+            # open file, read into string
+            original_contents = safe_read_contents(sample_file_fullpath)
+            # make replacements
+            new_content = replace_all(original_contents)
+            # write out new file
+            if new_content != original_contents:
+                os.remove(sample_file_fullpath)
+                safe_write_contents(sample_file_fullpath, new_content)
+        # rename any files (e.g. $$project$$.sln becomes AccessLoadStatus.sln)
+        directory, file_name = os.path.split(sample_file_fullpath)
+        new_name = replace_all(file_name)
+        if new_name != file_name:
+            os.rename(sample_file_fullpath, os.path.join(directory, new_name))
     
     def splitall(path):
         ## Credits: taken verbatim from https://www.oreilly.com/library/view/python-cookbook/0596001673/ch04s16.html
@@ -0,0 +1,78 @@
+'''
+In-memory copy of a platform's standalone solution template (templates/solutions/{platform}).
+Used by sample_metadata.emit_standalone_solution so that exporting many samples reads each template from disk only once.
+'''
+import os
+import re
+from file_utils import *
+
+class solution_template:
+    '''
+    Reads every file of a platform template once.
+    File names and the contents of text files are pre-split on the template tags, so rendering
+    a sample only joins the pieces with that sample's replacements.
+    '''
+
+    # Tags that emit_standalone_solution provides replacements for
+    tags = ["$$project$$", ".slntemplate", "$$embedded_resources$$", "$$code_and_xaml$$", "$$axml_files$$", "$$current_year$$", "$$friendly_name$$"]
+
+    # Only files with these extensions have their contents rewritten (see sample_metadata.rewrite_files_in_place)
+    text_extensions = [".cs", ".xaml", ".sln", ".slntemplate", ".md", ".csproj", ".shproj", ".axml", ".xml"]
+
+    def __init__(self, platform):
+        self.platform = platform
+        script_dir = os.path.split(os.path.realpath(__file__))[0]
+        self.template_dir = os.path.join(script_dir, "templates", "solutions", platform)
+
+        # A capturing split keeps the tags: odd-numbered pieces are tags, even-numbered pieces are literal text
+        tag_pattern = re.compile("(" + "|".join(re.escape(tag) for tag in sorted(solution_template.tags, key=len, reverse=True)) + ")")
+
+        # list of (relative path pieces, content pieces, path to template file)
+        # content pieces is None for files that are copied as-is (binary files, and text files without any tags)
+        self.files = []
+        # path to template file -> bytes, for the files copied as-is; used when writing to an archive
+        self.file_bytes = {}
+        for r, d, f in os.walk(self.template_dir):
+            for file_name in f:
+                template_file_path = os.path.join(r, file_name)
+                relative_path = os.path.relpath(template_file_path, self.template_dir)
+                content_pieces = None
+                if os.path.splitext(file_name)[1] in solution_template.text_extensions:
+                    content_pieces = tag_pattern.split(safe_read_contents(template_file_path))
+                    if len(content_pieces) == 1:
+                        content_pieces = None
+                if content_pieces is None:
+                    with open(template_file_path, 'rb') as template_file:
+                        self.file_bytes[template_file_path] = template_file.read()
+                self.files.append((tag_pattern.split(relative_path), content_pieces, template_file_path))
+
+    def render_pieces(pieces, replacements):
+        '''
+        Joins pre-split pieces, substituting the tags with their replacements
+        '''
+        return "".join(replacements.get(piece, piece) if i % 2 == 1 else piece for i, piece in enumerate(pieces))
+
+    def write_to(self, output_dir, replacements, copy_strategy="copy"):
+        '''
+        Writes the template into output_dir, replacing tags in file names and text file contents.
+        Files without tags are copied with copy_strategy (see file_utils.copy_file).
+        '''
+        for path_pieces, content_pieces, template_file_path in self.files:
+            output_path = os.path.join(output_dir, solution_template.render_pieces(path_pieces, replacements))
+            os.makedirs(os.path.dirname(output_path), exist_ok=True)
+            if content_pieces is None:
+                copy_file(template_file_path, output_path, copy_strategy)
+            else:
+                safe_write_contents(output_path, solution_template.render_pieces(content_pieces, replacements), like_file=template_file_path)
+
+    def render(self, replacements):
+        '''
+        Yields (relative path, bytes) for every template file, with tags replaced in names and text file contents.
+        Nothing is written to disk.
+        '''
+        for path_pieces, content_pieces, template_file_path in self.files:
+            relative_path = solution_template.render_pieces(path_pieces, replacements)
+            if content_pieces is None:
+                yield relative_path, self.file_bytes[template_file_path]
+            else:
+                yield relative_path, encode_text(solution_template.render_pieces(content_pieces, replacements), template_file_path)
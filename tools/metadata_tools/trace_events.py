@@ -0,0 +1,90 @@
+'''
+Records timed spans in Chrome trace event format, for the --trace option of the sample tools.
+Open the output in https://ui.perfetto.dev or chrome://tracing.
+Tracing is off unless start_tracing is called; span() then returns a shared object that does nothing.
+'''
+import json
+import os
+import threading
+import time
+
+enabled = False
+
+# Complete ("X") events recorded by this process
+events = []
+
+class null_span:
+    '''
+    Returned by span() while tracing is off
+    '''
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+disabled_span = null_span()
+
+class recorded_span:
+    '''
+    Records one complete event from __enter__ to __exit__
+    '''
+    def __init__(self, name, category, args):
+        self.name = name
+        self.category = category
+        self.args = args
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        end = time.perf_counter()
+        event = {"name": self.name, "cat": self.category, "ph": "X", "ts": self.start * 1e6, "dur": (end - self.start) * 1e6,
+                 "pid": os.getpid(), "tid": threading.get_ident()}
+        if self.args:
+            event["args"] = self.args
+        events.append(event)
+        return False
+
+def span(name, category="tools", args=None):
+    '''
+    Context manager timing a block of work, e.g. with span("readme parse", "sample", {"sample": name}):
+    args: optional dictionary shown with the event in the trace viewer
+    '''
+    if not enabled:
+        return disabled_span
+    return recorded_span(name, category, args)
+
+def start_tracing():
+    global enabled
+    enabled = True
+
+def call_traced(tracing, function, *args):
+    '''
+    Calls function in a worker process, with tracing on if it is on in the main process.
+    Returns (result, the events recorded during the call), so the main process can add them with add_events.
+    '''
+    if tracing:
+        start_tracing()
+    first_event = len(events)
+    result = function(*args)
+    worker_events = events[first_event:]
+    del events[first_event:]
+    return result, worker_events
+
+def add_events(worker_events):
+    '''
+    Adds events recorded by a worker process (see call_traced)
+    '''
+    events.extend(worker_events)
+
+def save_trace(path_to_trace):
+    '''
+    Writes the recorded events, with a name for each process, as a Chrome trace JSON file
+    '''
+    main_pid = os.getpid()
+    process_names = [{"name": "process_name", "ph": "M", "pid": pid, "args": {"name": "main" if pid == main_pid else f"worker {pid}"}}
+                     for pid in sorted(set(event["pid"] for event in events))]
+    with open(path_to_trace, 'w+') as trace_file:
+        json.dump({"traceEvents": process_names + events, "displayTimeUnit": "ms"}, trace_file)
@@ -1,46 +1,81 @@
 #!/usr/bin/env python3
 import sys
 import os
-import copy
+import re
+import io
+import errno
+import argparse
+import subprocess
+from contextlib import redirect_stdout
+from concurrent.futures import ProcessPoolExecutor
+
+# The shared sample tools (e.g. the samples index) live in the metadata_tools folder.
+sys.path.append(os.path.join(os.path.dirname(os.path.realpath(__file__)), "..", "metadata_tools"))
+from sample_index import get_index, get_platform_samples_root
+from file_utils import write_if_changed, summarize_writes
+from readme_parser import read_readme
+import trace_events
+from trace_events import span
 
 excluded_samples = [
     ("ChangeBasemap", "WinUI")
 ]
 
-def get_platform_samples_root(platform, sample_root):
-    '''
-    Gets the root directory for each platform
-    '''
-    if (platform == "UWP"):
-        return os.path.join(sample_root, "UWP", "ArcGISRuntime.UWP.Viewer", "Samples")
-    if (platform == "WPF"):
-        return os.path.join(sample_root, "WPF", "ArcGISRuntime.WPF.Viewer", "Samples")
-    if (platform == "Android"):
-        return os.path.join(sample_root, "Android", "Xamarin.Android", "Samples")
-    if (platform == "iOS"):
-        return os.path.join(sample_root, "iOS", "Xamarin.iOS", "Samples")
-    if (platform == "Forms" or platform in ["XFA", "XFI", "XFU"]):
-        return os.path.join(sample_root, "Forms", "Shared", "Samples")
-    if (platform == "WinUI"):
-        return os.path.join(sample_root, "WinUI", "ArcGISRuntime.WinUI.Viewer", "Samples")
-    raise AssertionError(None, None)
+# Platforms that get a copy of the WPF readme.
+target_platforms = ["Forms", "WinUI"] # "Android", "iOS", "UWP"
+
+def get_platform_substitutions(platform):
+    '''
+    Text to replace in the WPF readme for the platform's copy: the guide doc urls, and `click` -> `tap` for mobile platforms.
+    None of the texts overlap, so they can be replaced in a single pass.
+    '''
+    substitutions = {
+        "wpf/guide": str.lower(platform)+"/guide",
+        "wpf/sample-code/": str.lower(platform)+"/sample-code/",
+    }
+    # For other changes that need to be made.
+    #substitutions["oldlink"] = "newlink"
+    if not platform == "UWP" and not platform == "WinUI":
+        substitutions.update({"click ": "tap ", "Click ": "Tap ", "clicked ": "tapped ", "Clicked ": "Tapped "})
+    return substitutions
+
+# platform -> (compiled pattern matching any of the platform's substitutions, substitutions)
+platform_patterns = {}
+
+def convert_readme(content, platform):
+    '''
+    Returns the platform's version of the WPF readme text
+    '''
+    if platform not in platform_patterns:
+        substitutions = get_platform_substitutions(platform)
+        pattern = re.compile("|".join(re.escape(text) for text in sorted(substitutions, key=len, reverse=True)))
+        platform_patterns[platform] = (pattern, substitutions)
+    pattern, substitutions = platform_patterns[platform]
+    return pattern.sub(lambda match: substitutions[match.group(0)], content)
+
 def replace_readmes(category, formal_name, sample_root):
+    '''
+    Copies the WPF readme of a sample to the other platforms.
+    Returns the write_if_changed results for the platform readmes.
+    '''
+    with span("sample", "sample", {"category": category, "sample": formal_name}):
+        return copy_wpf_readme(category, formal_name, sample_root)
+
+def copy_wpf_readme(category, formal_name, sample_root):
+    write_results = []
     wpfcontent = None
     try:
         # Read the readme from the WPF version.
         wpf_path = os.path.join(get_platform_samples_root("WPF", sample_root), category, formal_name, ("readme.md"))
-        wpf_file = open(wpf_path, "r")
-        wpfcontent = wpf_file.read()
-        wpf_file.close()
+        wpfcontent = read_readme(wpf_path)
     except OSError as e:
         print(f"File: {formal_name} Error: {e.strerror} WPF read error")
 
     if wpfcontent is None:
-        return
+        return write_results
 
     # Loop through the other platforms.
-    plats = ["Forms", "WinUI"] # "Android", "iOS", "UWP"
-    for platform in plats:
+    for platform in target_platforms:
         # Skip local server for non WinUI platforms.
         if not platform == "WinUI" and category == "LocalServer":
             continue
@@ -49,54 +84,152 @@ def replace_readmes(category, formal_name, sample_root):
         if (formal_name, platform) in excluded_samples:
             continue
 
-        # Copy the original WPF text into a new string
-        platformcontent = copy.copy(wpfcontent)
-
-        # Fix the guide doc url for the platform
-        platformcontent = platformcontent.replace("wpf/guide", str.lower(platform)+"/guide")
-        platformcontent = platformcontent.replace("wpf/sample-code/", str.lower(platform)+"/sample-code/")
-
-        # For other changes that need to be made.
-        #platformcontent = platformcontent.replace("oldlink", "newlink")
-
-        # Change `click` to `tap` for mobile platforms
-        if  not platform == "UWP" and not platform == "WinUI":
-            platformcontent = platformcontent.replace("click ", "tap ")
-            platformcontent = platformcontent.replace("Click ", "Tap ")
-            platformcontent = platformcontent.replace("clicked ", "tapped ")
-            platformcontent = platformcontent.replace("Clicked ", "Tapped ")
+        with span("convert", "phase", {"platform": platform, "sample": formal_name}):
+            platformcontent = convert_readme(wpfcontent, platform)
 
         try:
-            # Write the WPF readme to other platform
+            # Write the WPF readme to other platform, if the platform has the sample and its readme changed
             platform_path = os.path.join(get_platform_samples_root(platform, sample_root), category, formal_name, ("readme.md"))
-            with open(platform_path, "r+") as file:
-                file.seek(0)
-                file.write(platformcontent)
-                file.truncate()
+            with span("write", "phase", {"platform": platform, "sample": formal_name}):
+                result = write_if_changed(platform_path, platformcontent, create=False)
+            if result == "skipped":
+                print(f"File: {formal_name} Error: {os.strerror(errno.ENOENT)} Platform: {platform}")
+            write_results.append(result)
         except OSError as e:
             print(f"File: {formal_name} Error: {e.strerror} Platform: {platform}")
+            write_results.append("skipped")
+    return write_results
+
+def get_wpf_samples(sample_root):
+    '''
+    Returns (category, formal name) for every WPF sample
+    '''
+    index = get_index(sample_root)
+    samples = []
+    wpf_samples_root = get_platform_samples_root("WPF", sample_root)
+    for category in index.listdir(wpf_samples_root):
+        for sample in index.listdir(os.path.join(wpf_samples_root, category)):
+            samples.append((category, sample))
+    return samples
+
+def copy_readmes(samples, sample_root, jobs=1):
+    '''
+    Copies the WPF readmes of the samples to the other platforms, on a pool of worker processes if jobs > 1.
+    Output is printed in sample order. Returns the write_if_changed results.
+    '''
+    write_results = []
+    if jobs > 1 and len(samples) > 1:
+        # results come back in submission order
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            # worker spans are returned with the results
+            results = executor.map(trace_events.call_traced, [trace_events.enabled] * len(samples), [copy_sample_readmes] * len(samples), [sample[0] for sample in samples], [sample[1] for sample in samples], [sample_root] * len(samples), chunksize=16)
+            for (output, sample_write_results), worker_events in results:
+                trace_events.add_events(worker_events)
+                print(output, end="")
+                write_results += sample_write_results
+    else:
+        for category, sample in samples:
+            write_results += replace_readmes(category, sample, sample_root)
+    return write_results
+
+def copy_sample_readmes(category, formal_name, sample_root):
+    '''
+    Runs replace_readmes for a sample in a worker process.
+    Returns (printed output, write results), so the output can be printed in sample order.
+    '''
+    with redirect_stdout(io.StringIO()) as output:
+        write_results = replace_readmes(category, formal_name, sample_root)
+    return output.getvalue(), write_results
+
+def get_changed_samples(sample_root, since):
+    '''
+    Asks git which WPF readmes changed between a revision and the working tree.
+    Returns (samples to copy, samples whose WPF readme was deleted or moved away), both lists of (category, formal name);
+    returns None if git fails.
+    '''
+    try:
+        diff = subprocess.run(["git", "diff", "--name-status", "-M", "--relative", since, "--", "."], cwd=sample_root, capture_output=True, text=True)
+    except OSError as e:
+        print(f"Error running git: {e.strerror}")
+        return None
+    if diff.returncode != 0:
+        print(f"Error running git: {diff.stderr.strip()}")
+        return None
+
+    wpf_samples_root = os.path.relpath(get_platform_samples_root("WPF", sample_root), sample_root).replace(os.sep, "/")
+    def get_sample(path):
+        parts = path.split("/")
+        if path.startswith(wpf_samples_root + "/") and len(parts) == len(wpf_samples_root.split("/")) + 3 and parts[-1] == "readme.md":
+            return parts[-3], parts[-2]
+        return None
+
+    changed_samples = []
+    removed_samples = []
+    for line in diff.stdout.splitlines():
+        fields = line.split("\t")
+        status = fields[0][0]
+        if status in ["R", "C"]:
+            # renamed or copied: the first path is the old location, the second the new one
+            old_sample, new_sample = get_sample(fields[1]), get_sample(fields[2])
+            if status == "R" and old_sample is not None and old_sample != new_sample:
+                removed_samples.append(old_sample)
+            if new_sample is not None:
+                changed_samples.append(new_sample)
+        elif status == "D":
+            if get_sample(fields[1]) is not None:
+                removed_samples.append(get_sample(fields[1]))
+        elif get_sample(fields[1]) is not None:
+            changed_samples.append(get_sample(fields[1]))
+    return list(dict.fromkeys(changed_samples)), list(dict.fromkeys(removed_samples))
+
 def main():
-    if len(sys.argv) == 4:
+    '''
+    Usage for single sample: python readme_copy.py {category} {formal name of sample} {path_to_samples (ends in src)}
+    Usage for all samples: python readme_copy.py {path_to_samples (ends in src)} (optional) [--since {git revision}] [--jobs {N}] [--trace {path}]
+        Location of script being run will be used for a relative path if path to samples is not specified.
+        With --since, only the WPF readmes that git reports as changed since the revision (including uncommitted changes) are copied.
+        Samples whose WPF readme was deleted or renamed are reported; their other platform readmes are never deleted.
+        With --jobs, samples are copied on a pool of N worker processes; output is identical to a serial run.
+        With --trace, the time spent per sample and platform is written to a Chrome trace file (see metadata_tools/trace_events.py).
+    '''
+    parser = argparse.ArgumentParser(description="Copies the WPF readme of each sample to the other platforms.")
+    parser.add_argument("arguments", nargs="*", help="{category} {formal name of sample} {path_to_samples}, or {path_to_samples}")
+    parser.add_argument("--since", help="only copy the WPF readmes changed since this git revision")
+    parser.add_argument("--jobs", type=int, default=1, help="number of worker processes used to copy readmes")
+    parser.add_argument("--trace", help="write a Chrome trace of where the time goes to this file")
+    args = parser.parse_args()
+    if args.trace:
+        trace_events.start_tracing()
+
+    if len(args.arguments) == 3:
         # Get the user arguments.
-        category = sys.argv[1]
-        formal_name = sys.argv[2]        
-        sample_root = sys.argv[3]
-        replace_readmes(category, formal_name, sample_root)
-    elif len(sys.argv) <= 2:
+        category, formal_name, sample_root = args.arguments
+        write_results = replace_readmes(category, formal_name, sample_root)
+    elif len(args.arguments) <= 1:
 
-        if len(sys.argv) == 1:
+        if len(args.arguments) == 0:
             # get the location of the samples relative to this script in the tools folder
             script_location = os.path.dirname(os.path.realpath(__file__))
             sample_root = os.path.abspath(os.path.join(script_location, "..", "..", "src"))
         else:
-            sample_root = sys.argv[1]
-        for category in os.listdir(get_platform_samples_root("WPF", sample_root)):
-            for sample in os.listdir( os.path.join(get_platform_samples_root("WPF", sample_root), category) ):
-                replace_readmes(category, sample, sample_root)
+            sample_root = args.arguments[0]
+        if args.since is not None:
+            changed = get_changed_samples(sample_root, args.since)
+            if changed is None:
+                return
+            samples, removed_samples = changed
+            for category, sample in removed_samples:
+                print(f"File: {sample} Warning: WPF readme was deleted or moved; the other platforms' readmes were left in place. Category: {category}")
+        else:
+            samples = get_wpf_samples(sample_root)
+        write_results = copy_readmes(samples, sample_root, args.jobs)
     else:
         print("Usage for single sample: python readme_copy.py {category} {formal name of sample} {path_to_samples (ends in src)}")
         print("Usage for all samples: python readme_copy.py {path_to_samples (ends in src)}")
         return
+    print(f"Readmes: {summarize_writes(write_results)}")
+    if args.trace:
+        trace_events.save_trace(args.trace)
 
 if __name__=="__main__":
-    main()
\ No newline at end of file
+    main()
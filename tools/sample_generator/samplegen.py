@@ -4,28 +4,14 @@ from datetime import datetime
 import os
 import sys
 
+# The shared sample tools (e.g. the samples index) live in the metadata_tools folder.
+sys.path.append(os.path.join(os.path.dirname(os.path.realpath(__file__)), "..", "metadata_tools"))
+from sample_index import get_platform_root
+
 # Platforms
 # iOS, Android, UWP can be added when needed
 Platforms = ["WPF", "Forms", "WinUI"]
 
-def get_platform_root(platform, sample_root):
-    '''
-    Gets the root directory for each platform
-    '''
-    if (platform == "UWP"):
-        return os.path.join(sample_root, "UWP", "ArcGISRuntime.UWP.Viewer")
-    if (platform == "WPF"):
-        return os.path.join(sample_root, "WPF", "ArcGISRuntime.WPF.Viewer")
-    if (platform == "Android"):
-        return os.path.join(sample_root, "Android", "Xamarin.Android")
-    if (platform == "Forms"):
-        return os.path.join(sample_root, "Forms", "Shared")
-    if (platform == "iOS"):
-        return os.path.join(sample_root, "iOS", "Xamarin.iOS")
-    if (platform == "WinUI"):
-        return os.path.join(sample_root, "WinUI", "ArcGISRuntime.WinUI.Viewer")
-    return ""
-
 def get_proj_file(platform, sample_root):
     '''
     Gets the full path to the csproj/vbproj/projitems file for the specified platform
@@ -1,25 +1,60 @@
 import sys
-import subprocess
 import os
 
-def main():
+# The readme copy and metadata tools run in this process, so the readmes copied by the first stage reach the second in memory.
+script_location = os.path.dirname(os.path.realpath(__file__))
+sys.path.append(os.path.join(script_location, "metadata_tools"))
+sys.path.append(os.path.join(script_location, "readme_copy"))
+from file_utils import defer_writes, get_deferred_contents, flush_deferred_writes, summarize_writes
+from sample_index import get_platform_samples_root
+from readme_parser import prime_readme, read_readme
+import readme_copy
+import process_metadata
+
+def sync_samples(sample_root):
     '''
-    Usage: python sample_sync.py 
+    Copies the WPF readmes to the other platforms, then updates the metadata, sample attributes and TOCs of every sample.
+    Each readme is read once: the metadata update parses the readmes produced by the copy from memory.
+    Nothing is written until both stages are done; then the files that changed are written in one pass.
     '''
-
-    script_location = os.path.dirname(os.path.realpath(__file__))
-    readme_script_folder = os.path.abspath(os.path.join(script_location, "readme_copy"))
-    readme_script_path = os.path.join(readme_script_folder, "readme_copy.py")
-    metadata_script_folder = os.path.abspath(os.path.join(script_location, "metadata_tools"))
-    metadata_script_path = os.path.join(metadata_script_folder, "process_metadata.py")
+    defer_writes()
 
     print("Copying readmes")
-    subprocess.run(["python", readme_script_path])
+    samples = readme_copy.get_wpf_samples(sample_root)
+    for category, sample in samples:
+        wpf_path = os.path.join(get_platform_samples_root("WPF", sample_root), category, sample, "readme.md")
+        try:
+            prime_readme(wpf_path, read_readme(wpf_path))
+        except OSError:
+            # reported by the copy
+            pass
+    write_results = readme_copy.copy_readmes(samples, sample_root)
+    print(f"Readmes: {summarize_writes(write_results)}")
+
+    # the platform readmes as the copy left them, including unchanged ones, so the metadata update doesn't read them again
+    for path_to_file, contents in get_deferred_contents().items():
+        if os.path.basename(path_to_file) == "readme.md":
+            prime_readme(path_to_file, contents)
 
     print("Updating metadata")
-    subprocess.run(["python", metadata_script_path])
+    write_results = process_metadata.process_all_samples(sample_root)
+    print(f"Files: {summarize_writes(write_results)}")
+
+    flush_deferred_writes()
+
+def main():
+    '''
+    Usage: python sample_sync.py {path_to_samples (ends in src)} (optional)
+        Location of script being run will be used for a relative path if path to samples is not specified.
+    '''
+    if len(sys.argv) > 1:
+        sample_root = sys.argv[1]
+    else:
+        # get the location of the samples relative to this script in the tools folder
+        sample_root = os.path.abspath(os.path.join(script_location, "..", "src"))
 
+    sync_samples(sample_root)
     return
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -1,30 +1,212 @@
 import os, sys
+import json
+import struct
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+# The shared sample tools (e.g. the samples index) live in the metadata_tools folder.
+sys.path.append(os.path.join(os.path.dirname(os.path.realpath(__file__)), "..", "metadata_tools"))
+from sample_index import get_index, get_platform_samples_root, platforms
 try:
+    # only needed for images whose header can't be read directly
     from PIL import Image
-except:
-    print("There was an error. Do you have Pillow installed?")
-    exit()
+except ImportError:
+    Image = None
+
+expected_size = (800, 600)
+
+screenshot_extensions = [".jpg", ".jpeg", ".png"]
+
+# Bump when the cache layout changes; older caches are discarded.
+cache_version = 1
+
+png_signature = b"\x89PNG\r\n\x1a\n"
+
+# JPEG start of frame markers (SOF0-SOF15, except DHT, JPG and DAC), which hold the image dimensions
+jpeg_sof_markers = [0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF]
+
+# JPEG markers without a length or payload (TEM, RST0-RST7)
+jpeg_standalone_markers = [0x01, 0xD0, 0xD1, 0xD2, 0xD3, 0xD4, 0xD5, 0xD6, 0xD7]
+
+def read_png_size(image_file):
+    '''
+    Reads the dimensions from the IHDR chunk, which always comes first in a PNG
+    '''
+    header = image_file.read(24)
+    if len(header) < 24 or not header.startswith(png_signature) or header[12:16] != b"IHDR":
+        return None
+    return struct.unpack(">II", header[16:24])
+
+def read_jpeg_size(image_file):
+    '''
+    Reads the dimensions from the first start of frame segment, seeking past the segments before it
+    '''
+    if image_file.read(2) != b"\xff\xd8":
+        return None
+    while True:
+        byte = image_file.read(1)
+        # markers start with 0xff and may be padded with more 0xff bytes
+        while byte and byte != b"\xff":
+            byte = image_file.read(1)
+        while byte == b"\xff":
+            byte = image_file.read(1)
+        if not byte:
+            return None
+        marker = byte[0]
+        if marker in jpeg_standalone_markers:
+            continue
+        if marker in [0xD9, 0xDA]:
+            # end of image, or start of the compressed data, before any frame header
+            return None
+        length_bytes = image_file.read(2)
+        if len(length_bytes) < 2:
+            return None
+        length = struct.unpack(">H", length_bytes)[0]
+        if marker in jpeg_sof_markers:
+            frame_header = image_file.read(5)
+            if len(frame_header) < 5:
+                return None
+            precision, height, width = struct.unpack(">BHH", frame_header)
+            return width, height
+        image_file.seek(length - 2, os.SEEK_CUR)
+
+def get_image_size(file):
+    '''
+    Returns (width, height) of a JPEG or PNG image, reading only its header.
+    Falls back to Pillow (if installed) for images the header readers don't understand; returns None if the size can't be read.
+    '''
+    with open(file, 'rb') as image_file:
+        if image_file.read(len(png_signature)) == png_signature:
+            image_file.seek(0)
+            size = read_png_size(image_file)
+        else:
+            image_file.seek(0)
+            size = read_jpeg_size(image_file)
+    if size is None and Image is not None:
+        try:
+            with Image.open(file) as image:
+                size = image.size
+        except OSError:
+            pass
+    return None if size is None else tuple(size)
 
 def check_file(file):
-    image = Image.open(file)
-    if (image.size != (800, 600)):
-        print(f"{file}: expected 800x600, actually was {image.size}")
-        
+    '''
+    Prints an error and returns False if the screenshot isn't 800x600
+    '''
+    return report_size(file, get_image_size(file))
+
+def report_size(file, size):
+    if size is None:
+        print(f"{file}: could not read the image dimensions")
+        return False
+    if (size != expected_size):
+        print(f"{file}: expected 800x600, actually was {size}")
+        return False
+    return True
 
-def check_directory(directory):
-    for root, dirs, files in os.walk(directory):
+def find_screenshots(directory, index):
+    '''
+    Yields (path, file_info) for the screenshots in a folder of samples.
+    Screenshots are the images next to a sample's readme.md; other images (e.g. icons in resources folders) are ignored.
+    '''
+    for root, dirs, files in index.walk(directory):
+        if "readme.md" not in files:
+            continue
+        file_infos = index.files(root)
         for file in files:
-            if file.endswith('.jpg') or file.endswith('.jpeg'):
-                check_file(os.path.join(directory, root, file))
+            if os.path.splitext(file)[1].lower() in screenshot_extensions:
+                yield os.path.join(root, file), file_infos[file]
+
+def get_screenshot_dirs(path):
+    '''
+    The folders to check: every platform's samples folder if path is the samples root (ends in src), otherwise path itself
+    '''
+    directories = []
+    for platform in platforms:
+        platform_samples_root = get_platform_samples_root(platform, path)
+        if os.path.isdir(platform_samples_root) and platform_samples_root not in directories:
+            directories.append(platform_samples_root)
+    return directories if directories else [path]
+
+def load_cache(path_to_cache):
+    '''
+    Reads the dimensions recorded by the previous run: absolute path -> [size, mtime, width, height].
+    Returns an empty dictionary if the cache is missing or has a different layout.
+    '''
+    try:
+        with open(path_to_cache, 'r') as cache_file:
+            cache = json.load(cache_file)
+    except (OSError, ValueError):
+        return {}
+    if cache.get("version") != cache_version:
+        return {}
+    return cache.get("files", {})
+
+def save_cache(path_to_cache, files):
+    with open(path_to_cache, 'w+') as cache_file:
+        json.dump({"version": cache_version, "files": files}, cache_file, sort_keys=True)
+
+def check_directories(directories, cache, jobs=None):
+    '''
+    Checks every screenshot in the folders; images whose size and modification time match the cache aren't read again.
+    Headers are read on a thread pool; errors are printed in discovery order.
+    Returns (number of screenshots, number read from the cache, number with errors, updated cache).
+    '''
+    screenshots = []
+    for directory in directories:
+        index = get_index(directory)
+        screenshots.extend(find_screenshots(directory, index))
+
+    sizes = {}
+    pending = []
+    for file, info in screenshots:
+        entry = cache.get(os.path.abspath(file))
+        if entry is not None and entry[0] == info.size and entry[1] == info.mtime:
+            sizes[file] = tuple(entry[2:]) if entry[2] is not None else None
+        else:
+            pending.append(file)
+    cached_count = len(sizes)
+
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        sizes.update(zip(pending, executor.map(get_image_size, pending)))
+
+    error_count = 0
+    new_cache = {}
+    for file, info in screenshots:
+        size = sizes[file]
+        if not report_size(file, size):
+            error_count += 1
+        new_cache[os.path.abspath(file)] = [info.size, info.mtime] + (list(size) if size is not None else [None, None])
+    return len(screenshots), cached_count, error_count, new_cache
 
 def main():
-    if (len(sys.argv) != 2):
-        print("Usage: python screenshot_check.py C:\\SamplesDotNET\\src\\platform\\viewer.project\\Samples")
-        return
-    base_path = sys.argv[1]
+    '''
+    Usage: python screenshot_check.py {path_to_samples (ends in src)} (optional) [--cache {path}] [--no-cache] [--jobs {N}]
+        Checks the screenshots of every platform. The path may instead be a single platform's Samples folder.
+        Location of script being run will be used for a relative path if path to samples is not specified.
+    '''
+    script_location = os.path.dirname(os.path.realpath(__file__))
+
+    parser = argparse.ArgumentParser(description="Identifies sample screenshots that aren't 800x600.")
+    parser.add_argument("path", nargs="?", help="path to samples (ends in src), or a platform's Samples folder, e.g. C:\\SamplesDotNET\\src\\WPF\\ArcGISRuntime.WPF.Viewer\\Samples")
+    parser.add_argument("--cache", default=os.path.join(script_location, ".screenshot_check_cache.json"), help="path to the cache of image dimensions from previous runs")
+    parser.add_argument("--no-cache", action="store_true", help="read every image, and don't update the cache")
+    parser.add_argument("--jobs", type=int, default=None, help="number of threads used to read images")
+    args = parser.parse_args()
+
+    if args.path is None:
+        # get the location of the samples relative to this script in the tools folder
+        path = os.path.abspath(os.path.join(script_location, "..", "..", "src"))
+    else:
+        path = args.path
 
-    check_directory(base_path)
-    return
+    cache = {} if args.no_cache else load_cache(args.cache)
+    screenshot_count, cached_count, error_count, new_cache = check_directories(get_screenshot_dirs(path), cache, args.jobs)
+    if not args.no_cache:
+        save_cache(args.cache, new_cache)
+    print(f"Checked {screenshot_count} screenshots ({cached_count} unchanged since the last run), {error_count} with errors")
+    if error_count > 0:
+        sys.exit(1)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,85 @@
+import os, sys
+import hashlib
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+# The shared sample tools (e.g. the samples index) live in the metadata_tools folder.
+sys.path.append(os.path.join(os.path.dirname(os.path.realpath(__file__)), "..", "metadata_tools"))
+from sample_index import get_index, get_platform_samples_root, platforms
+from screenshot_check import find_screenshots
+
+def hash_file(file):
+    '''
+    SHA-256 of a file's bytes
+    '''
+    digest = hashlib.sha256()
+    with open(file, 'rb') as image_file:
+        for chunk in iter(lambda: image_file.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def find_platform_screenshots(sample_root):
+    '''
+    Returns a list of (platform, path, file_info) for the screenshots of every platform
+    '''
+    index = get_index(sample_root)
+    screenshots = []
+    for platform in platforms:
+        platform_samples_root = get_platform_samples_root(platform, sample_root)
+        for file, info in find_screenshots(platform_samples_root, index):
+            screenshots.append((platform, file, info))
+    return screenshots
+
+def find_duplicates(screenshots, jobs=None):
+    '''
+    Groups byte-identical screenshots. Files are hashed on a thread pool; only files that share a size are hashed.
+    Returns a list of lists of (platform, path, file_info), largest waste first; each group is in platform order.
+    '''
+    by_size = {}
+    for screenshot in screenshots:
+        by_size.setdefault(screenshot[2].size, []).append(screenshot)
+    candidates = [screenshot for group in by_size.values() if len(group) > 1 for screenshot in group]
+
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        hashes = list(executor.map(hash_file, [screenshot[1] for screenshot in candidates]))
+
+    by_hash = {}
+    for screenshot, file_hash in zip(candidates, hashes):
+        by_hash.setdefault(file_hash, []).append(screenshot)
+    groups = [group for group in by_hash.values() if len(group) > 1]
+    groups.sort(key=lambda group: (-get_wasted_bytes(group), group[0][1]))
+    return groups
+
+def get_wasted_bytes(group):
+    return group[0][2].size * (len(group) - 1)
+
+def print_report(groups, sample_root):
+    for group in groups:
+        print(f"{len(group)} copies of {group[0][2].size} bytes, {get_wasted_bytes(group)} bytes wasted:")
+        for platform, file, info in group:
+            print(f"    {os.path.relpath(file, sample_root)}")
+    print(f"{len(groups)} groups of identical screenshots, {sum(get_wasted_bytes(group) for group in groups)} bytes wasted")
+
+def main():
+    '''
+    Usage: python screenshot_dedup.py {path_to_samples (ends in src)} (optional) [--jobs {N}]
+        Reports groups of byte-identical screenshots across the platforms. Nothing is changed: every copy is
+        referenced by its own sample's readme and metadata, which are read from the sample folder.
+    '''
+    script_location = os.path.dirname(os.path.realpath(__file__))
+
+    parser = argparse.ArgumentParser(description="Finds identical screenshots across the platforms.")
+    parser.add_argument("sample_root", nargs="?", help="path to samples (ends in src)")
+    parser.add_argument("--jobs", type=int, default=None, help="number of threads used to hash screenshots")
+    args = parser.parse_args()
+
+    if args.sample_root is None:
+        # get the location of the samples relative to this script in the tools folder
+        sample_root = os.path.abspath(os.path.join(script_location, "..", "..", "src"))
+    else:
+        sample_root = args.sample_root
+
+    groups = find_duplicates(find_platform_screenshots(sample_root), args.jobs)
+    print_report(groups, sample_root)
+
+if __name__ == "__main__":
+    main()
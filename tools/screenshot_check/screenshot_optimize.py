@@ -0,0 +1,151 @@
+import os, sys
+import io
+import json
+import hashlib
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+# The shared sample tools (e.g. the samples index) live in the metadata_tools folder.
+sys.path.append(os.path.join(os.path.dirname(os.path.realpath(__file__)), "..", "metadata_tools"))
+from sample_index import get_index
+from screenshot_check import expected_size, find_screenshots, get_screenshot_dirs
+try:
+    from PIL import Image
+except ImportError:
+    print("There was an error. Do you have Pillow installed?")
+    sys.exit(1)
+
+jpeg_extensions = [".jpg", ".jpeg"]
+
+# Bump when the manifest layout changes; older manifests are discarded.
+manifest_version = 2
+
+# Statuses of screenshots that were processed without an error
+processed_statuses = ["optimized", "under budget", "no gain"]
+
+def optimize_file(file, settings):
+    '''
+    Re-encodes a JPEG screenshot that is larger than the size budget, if that makes it smaller.
+    settings: dictionary with max_bytes, quality and progressive
+    Returns (status, size before, size after, hash of the file's final content); status is one of
+    "optimized", "under budget", "no gain" or an error message. The image's colour profile and EXIF data are kept.
+    '''
+    with open(file, 'rb') as image_file:
+        original_bytes = image_file.read()
+    if len(original_bytes) <= settings["max_bytes"]:
+        return "under budget", len(original_bytes), len(original_bytes), hashlib.sha256(original_bytes).hexdigest()
+
+    try:
+        image = Image.open(io.BytesIO(original_bytes))
+        image.load()
+    except OSError:
+        return "could not be decoded", len(original_bytes), len(original_bytes), hashlib.sha256(original_bytes).hexdigest()
+
+    try:
+        with image:
+            if image.size != expected_size:
+                return f"expected 800x600, actually was {image.size}", len(original_bytes), len(original_bytes), hashlib.sha256(original_bytes).hexdigest()
+            # carry the colour profile and EXIF data over to the new file, which doesn't get them by default
+            metadata = {key: image.info[key] for key in ["icc_profile", "exif"] if image.info.get(key)}
+            # JPEG can't store an alpha channel or a palette; keep the opened image bound to `image` so `with` closes it
+            jpeg_image = image.convert("RGB") if image.mode not in ["RGB", "L"] else image
+            output = io.BytesIO()
+            jpeg_image.save(output, "JPEG", quality=settings["quality"], optimize=True, progressive=settings["progressive"], **metadata)
+    except OSError as e:
+        return f"could not be re-encoded ({e})", len(original_bytes), len(original_bytes), hashlib.sha256(original_bytes).hexdigest()
+
+    new_bytes = output.getvalue()
+    if len(new_bytes) >= len(original_bytes):
+        return "no gain", len(original_bytes), len(original_bytes), hashlib.sha256(original_bytes).hexdigest()
+
+    # write next to the original and swap, so an interrupted run never leaves a truncated screenshot
+    temp_path = file + ".tmp"
+    with open(temp_path, 'wb') as temp_file:
+        temp_file.write(new_bytes)
+    os.replace(temp_path, file)
+    return "optimized", len(original_bytes), len(new_bytes), hashlib.sha256(new_bytes).hexdigest()
+
+def hash_file(file):
+    with open(file, 'rb') as image_file:
+        return hashlib.sha256(image_file.read()).hexdigest()
+
+def load_manifest(path_to_manifest, settings):
+    '''
+    Reads the screenshots processed by earlier runs: (set of hashes, {hash: error message} for the ones that failed).
+    Both are empty if the manifest is missing, or was written with different settings.
+    '''
+    try:
+        with open(path_to_manifest, 'r') as manifest_file:
+            manifest = json.load(manifest_file)
+    except (OSError, ValueError):
+        return set(), {}
+    if manifest.get("version") != manifest_version or manifest.get("settings") != settings:
+        return set(), {}
+    return set(manifest.get("hashes", [])), dict(manifest.get("failures", {}))
+
+def save_manifest(path_to_manifest, settings, hashes, failures):
+    with open(path_to_manifest, 'w+') as manifest_file:
+        json.dump({"version": manifest_version, "settings": settings, "hashes": sorted(hashes), "failures": failures}, manifest_file, indent=4, sort_keys=True)
+
+def main():
+    '''
+    Usage: python screenshot_optimize.py {path_to_samples (ends in src)} (optional) [--max-bytes {N}] [--quality {N}] [--progressive] [--manifest {path}] [--jobs {N}]
+        Re-encodes the JPEG screenshots of every platform that are larger than the size budget. The path may instead be a single platform's Samples folder.
+        Screenshots whose content hash is in the manifest were processed by an earlier run with the same settings, and are skipped;
+        the errors of the ones that failed (e.g. couldn't be decoded) are reported again without decoding them.
+    '''
+    script_location = os.path.dirname(os.path.realpath(__file__))
+
+    parser = argparse.ArgumentParser(description="Re-encodes sample screenshots that are larger than a size budget.")
+    parser.add_argument("path", nargs="?", help="path to samples (ends in src), or a platform's Samples folder")
+    parser.add_argument("--max-bytes", type=int, default=150000, help="screenshots up to this size are left as they are")
+    parser.add_argument("--quality", type=int, default=85, help="JPEG quality (1-95) of re-encoded screenshots")
+    parser.add_argument("--progressive", action="store_true", help="write progressive JPEGs")
+    parser.add_argument("--manifest", default=os.path.join(script_location, ".screenshot_optimize_manifest.json"), help="path to the manifest of processed screenshots")
+    parser.add_argument("--jobs", type=int, default=None, help="number of worker processes used to re-encode screenshots")
+    args = parser.parse_args()
+
+    if args.path is None:
+        # get the location of the samples relative to this script in the tools folder
+        path = os.path.abspath(os.path.join(script_location, "..", "..", "src"))
+    else:
+        path = args.path
+
+    settings = {"max_bytes": args.max_bytes, "quality": args.quality, "progressive": args.progressive}
+    processed_hashes, failures = load_manifest(args.manifest, settings)
+
+    screenshots = []
+    for directory in get_screenshot_dirs(path):
+        for file, info in find_screenshots(directory, get_index(directory)):
+            if os.path.splitext(file)[1].lower() in jpeg_extensions:
+                screenshots.append(file)
+
+    hashes = [hash_file(file) for file in screenshots]
+    pending = [file for file, file_hash in zip(screenshots, hashes) if file_hash not in processed_hashes and file_hash not in failures]
+    new_hashes = set(file_hash for file_hash in hashes if file_hash in processed_hashes)
+    new_failures = {file_hash: failures[file_hash] for file_hash in hashes if file_hash in failures}
+    for file, file_hash in zip(screenshots, hashes):
+        if file_hash in failures:
+            print(f"{file}: {failures[file_hash]}")
+
+    # results come back in submission order, so the output doesn't depend on the number of workers
+    with ProcessPoolExecutor(max_workers=args.jobs) as executor:
+        results = list(executor.map(optimize_file, pending, [settings] * len(pending), chunksize=8))
+
+    optimized_count = 0
+    saved_bytes = 0
+    for file, (status, old_size, new_size, file_hash) in zip(pending, results):
+        if status not in processed_statuses:
+            print(f"{file}: {status}")
+            new_failures[file_hash] = status
+            continue
+        new_hashes.add(file_hash)
+        if status == "optimized":
+            optimized_count += 1
+            saved_bytes += old_size - new_size
+            print(f"{file}: {old_size} -> {new_size} bytes")
+
+    save_manifest(args.manifest, settings, new_hashes, new_failures)
+    print(f"Optimized {optimized_count} of {len(screenshots)} screenshots ({len(screenshots) - len(pending)} already processed), saved {saved_bytes} bytes")
+
+if __name__ == "__main__":
+    main()